@@ -1,6 +1,7 @@
-import copy, os, numpy
+import os, numpy
 from PIL import Image
-from scipy.fft import dctn, idctn
+from mar08_dct_cache import forward_dct
+from mar08_progressive import ProgressiveIDCT
 
 # dct part 2.
 # perform 2d dct on the image. zero the lower frequencies. perform inverse dct.
@@ -15,34 +16,40 @@ img = Image.open('./2025/Mar.08/input/japan_sq.png').convert('YCbCr')
 channel_names = ['y', 'cb', 'cr']
 channels = img.split()
 os.makedirs("./2025/Mar.08/debug/", exist_ok=True)
+os.makedirs("./2025/Mar.08/frames/", exist_ok=True)
 width, height = img.size
 r_max = int(((width / 2) ** 2 + (height / 2) ** 2) ** 0.5)
 
-dct_data = [ ]
+# all three channels as one (3, height, width) stack from the shared cache,
+# with each channel's denormalization scale and offset broadcast along the
+# channel axis.
+dct_stack = forward_dct('./2025/Mar.08/input/japan_sq.png')
 for index in range(3):
     name, ch = channel_names[index], channels[index]
     ch.convert("L").save(f"./2025/Mar.08/debug/source_{name}.png")
-    this_dct = dctn(numpy.array(ch, dtype=float))
-    dct_data.append(this_dct)
-    Image.fromarray(this_dct.astype(numpy.uint8)).save(f"./2025/Mar.08/debug/dct_{name}.png")
-    this_dct_normalized = (this_dct - this_dct.min()) / (this_dct.max() - this_dct.min()) * 255
+    Image.fromarray(dct_stack[index].astype(numpy.uint8)).save(f"./2025/Mar.08/debug/dct_{name}.png")
 
+scale = numpy.array([d.max() - d.min() for d in dct_stack], dtype=float)[:, None, None]
+offset = numpy.array([d.min() for d in dct_stack], dtype=float)[:, None, None]
+
+# distance of every coefficient from the centre, built once. a frame keeps the
+# coefficients within its radius, so its mask is a single comparison.
+rows, cols = numpy.indices((height, width))
+distance = ((cols - width / 2) ** 2 + (rows - height / 2) ** 2) ** 0.5
+frame_dct = numpy.empty(dct_stack.shape)
+# consecutive frames differ by one ring of coefficients, so frames are
+# reconstructed incrementally instead of with a full idctn each.
+progressive = ProgressiveIDCT(dct_stack.shape)
 
 for radius in range(r_max):
-    this_frame_ch = [ ]
-    for ch_index in range(3):
-        this_channel = copy.deepcopy(dct_data[ch_index])
-        for x in range(width):
-            for y in range(height):
-                if ((x - width / 2) ** 2 + (y - height / 2) ** 2) ** 0.5 > radius:
-                    this_channel[x, y] = 0
-        this_channel_denormalized = this_channel * (dct_data[ch_index].max() - dct_data[ch_index].min()) + dct_data[ch_index].min()
-        idct_data = idctn(this_channel_denormalized).clip(0, 255).astype(numpy.uint8)
-        #idct_data = idctn(this_channel).clip(0, 255).astype(numpy.uint8)
-        this_frame_ch.append(idct_data)
-
-    merged = Image.merge("YCbCr", [Image.fromarray(c) for c in this_frame_ch]).convert("RGB")
-    merged.save(f"./2025/Mar.08/frames/frame {str(radius).zfill(3)}.png")
+    numpy.multiply(dct_stack, distance <= radius, out=frame_dct)
+    frame_dct *= scale
+    frame_dct += offset
+    idct_data = progressive.update(frame_dct).clip(0, 255).astype(numpy.uint8)
+
+    merged = Image.merge("YCbCr", [Image.fromarray(c) for c in idct_data]).convert("RGB")
+    # frames only feed mar08_makemp4.py, so favour encode speed over size.
+    merged.save(f"./2025/Mar.08/frames/frame {str(radius).zfill(3)}.png", compress_level=1)
 
     frac = radius / (r_max - 1) if r_max > 1 else 1
     filled = int(frac * 32)
@@ -50,3 +57,4 @@ for radius in range(r_max):
     percent = frac * 100
     print(f'\r[{bar}] frame {radius} of {r_max} ({percent:.2f}%)', end='')
 
+print(f'\n{progressive.sparse_updates} sparse and {progressive.dense_updates} dense frames, {progressive.resyncs} resyncs')
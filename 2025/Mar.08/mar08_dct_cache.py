@@ -0,0 +1,47 @@
+import hashlib, os, numpy
+from PIL import Image
+from scipy.fft import dctn
+
+# forward dct cache shared by the march dct scripts.
+# mar08, mar10 and mar11 all start from the same photo's dct, so it is
+# computed once and kept on disk as float32 .npy, keyed by a hash of the
+# source file plus the colorspace and transform settings. a changed source
+# or setting gets a new file; stale ones can simply be deleted. the files are
+# several MB each, so they live in the user cache rather than the repo.
+
+
+def default_cache_dir():
+    # $MAR08_DCT_CACHE_DIR, else genuary/dct under the user cache.
+    override = os.environ.get('MAR08_DCT_CACHE_DIR')
+    if override:
+        return override
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'genuary', 'dct')
+
+
+def cache_path(path, mode='YCbCr', type=2, norm=None, cache_dir=None):
+    cache_dir = cache_dir or default_cache_dir()
+    with open(path, 'rb') as file:
+        digest = hashlib.sha256(file.read()).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f'{stem} {digest} {mode.lower()} dct{type} {norm or "none"}.npy')
+
+
+def forward_dct(path, mode='YCbCr', type=2, norm=None, cache_dir=None):
+    """(channels, height, width) dctn of each channel of the image at path.
+
+    the image is converted to mode first, and type and norm are passed to
+    scipy's dctn. the result is a read-only float32 memmap of the cache file,
+    which is written on the first call for a given source and settings.
+    """
+    target = cache_path(path, mode, type, norm, cache_dir)
+    if not os.path.exists(target):
+        img = Image.open(path).convert(mode)
+        coefficients = numpy.stack([dctn(numpy.array(ch, dtype=float), type=type, norm=norm) for ch in img.split()])
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # write beside the target and rename, so a script running alongside
+        # never maps a half-written file.
+        temporary = f'{target[:-4]} {os.getpid()}.tmp.npy'
+        numpy.save(temporary, coefficients.astype(numpy.float32))
+        os.replace(temporary, target)
+    return numpy.load(target, mmap_mode='r')
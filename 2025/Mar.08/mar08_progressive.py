@@ -0,0 +1,69 @@
+import numpy
+from scipy.fft import idct, idctn
+
+# progressive inverse dct for frame sweeps.
+# the inverse dct is linear, so when consecutive frames differ by a few
+# coefficients the next frame is the last one plus the inverse transform of
+# just the difference. a running spatial accumulator per channel adds that
+# delta instead of transforming every frame from scratch.
+
+
+def idct_matrix(size):
+    # column u is the inverse dct of the u-th unit vector, so for a single
+    # channel idctn(x) == idct_matrix(h) @ x @ idct_matrix(w).T
+    return idct(numpy.eye(size), axis=0)
+
+
+class ProgressiveIDCT:
+    """running idctn of a (channels, height, width) coefficient stack.
+
+    each update() takes the frame's full coefficient stack and returns its
+    inverse transform. pass changed=(rows, cols) when the caller knows which
+    positions differ from the previous frame; otherwise they are found by
+    comparing the stacks. up to sparse_limit changed positions are applied as
+    a sum of outer products of basis columns, a (height x n) @ (n x width)
+    product per channel; more than that and the stack is transformed again
+    from scratch. every resync_every frames the accumulator is recomputed
+    from the coefficients so float error from the running sums stays bounded.
+    """
+
+    def __init__(self, shape, resync_every=32, sparse_limit=None):
+        channels, height, width = shape
+        self.coefficients = numpy.zeros(shape)
+        self.spatial = numpy.zeros(shape)
+        self.row_basis = idct_matrix(height)
+        self.col_basis = idct_matrix(width)
+        self.resync_every = resync_every
+        # the matrix form costs about height * width * n multiply-adds per
+        # channel, which overtakes the fft-based idctn at around 3/8 of the
+        # image edge.
+        self.sparse_limit = min(height, width) * 3 // 8 if sparse_limit is None else sparse_limit
+        self.frames = 0
+        self.sparse_updates = 0
+        self.dense_updates = 0
+        self.resyncs = 0
+
+    def update(self, coefficients, changed=None):
+        if self.resync_every and self.frames % self.resync_every == 0:
+            self.spatial[:] = idctn(coefficients, axes=(1, 2))
+            self.coefficients[:] = coefficients
+            self.resyncs += 1
+        else:
+            if changed is None:
+                changed = numpy.nonzero((coefficients != self.coefficients).any(axis=0))
+            rows, cols = changed
+            if len(rows) > self.sparse_limit:
+                self.spatial[:] = idctn(coefficients, axes=(1, 2))
+                self.coefficients[:] = coefficients
+                self.dense_updates += 1
+            elif len(rows):
+                # (channels, n) deltas weight the row basis columns of each
+                # channel, then one batched matmul adds every outer product.
+                delta = coefficients[:, rows, cols] - self.coefficients[:, rows, cols]
+                weighted = self.row_basis[:, rows] * delta[:, None, :]
+                self.spatial += weighted @ self.col_basis[:, cols].T
+                self.coefficients[:, rows, cols] = coefficients[:, rows, cols]
+                self.sparse_updates += 1
+
+        self.frames += 1
+        return self.spatial
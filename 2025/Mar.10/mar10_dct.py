@@ -1,6 +1,9 @@
-import copy, os, numpy
+import os, sys, numpy
 from PIL import Image
-from scipy.fft import dctn, idctn
+
+sys.path.append('./2025/Mar.08')
+from mar08_dct_cache import forward_dct
+from mar08_progressive import ProgressiveIDCT
 
 # dct part 2.
 # perform 2d dct on the image. zero the lower frequencies. perform inverse dct.
@@ -19,37 +22,45 @@ os.makedirs("./2025/Mar.10/frames/", exist_ok=True)
 width, height = img.size
 r_max = int(((width / 2) ** 2 + (height / 2) ** 2) ** 0.5)
 
-dct_data = [ ]
+dct_stack = forward_dct('./2025/Mar.08/input/japan_sq.png')
 for index in range(3):
     name, ch = channel_names[index], channels[index]
     ch.convert("L").save(f"./2025/Mar.10/debug/source_{name}.png")
-    this_dct = dctn(numpy.array(ch, dtype=float))
-    dct_data.append(this_dct)
+    this_dct = dct_stack[index]
     this_dct_normalized = (this_dct - this_dct.min()) / (this_dct.max() - this_dct.min()) * 255
     Image.fromarray(this_dct.astype(numpy.uint8)).save(f"./2025/Mar.10/debug/dct_{name}.png")
 
 
+def folded_distance(size):
+    # distance of each index from the nearer end of its axis, which is how the
+    # four mirrored quadrants meet. an odd axis has a middle index that no
+    # quadrant covers, so it is always kept.
+    index = numpy.arange(size)
+    folded = numpy.minimum(index, size - 1 - index).astype(float)
+    if size % 2:
+        folded[size // 2] = -numpy.inf
+    return folded
+
+
+# manhattan x + y distance of every coefficient from its quadrant's corner,
+# built once. a frame keeps the coefficients below each channel's threshold:
+# luma reaches twice as far along the diagonal as chroma.
+manhattan = folded_distance(height)[:, None] + folded_distance(width)[None, :]
+reach = numpy.array([2, 1, 1])[:, None, None]
+
+# per-frame masks and coefficients are written into these, not reallocated.
+keep = numpy.empty(dct_stack.shape, dtype=bool)
+frame_dct = numpy.empty(dct_stack.shape)
+
 TOTAL_FRAMES = 256 // 3
+# each frame keeps one more diagonal band of coefficients than the last, so
+# frames are reconstructed incrementally instead of with a full idctn each.
+progressive = ProgressiveIDCT(dct_stack.shape)
 for distance in range(1, TOTAL_FRAMES):
-    this_dct_data = copy.deepcopy(dct_data)
-    for x in range(int(width/2)):
-        for y in range(int(height/2)):
-            if x + y >= distance:
-                for index, channel in enumerate(this_dct_data[1:]):
-                    channel[x, y] = 0
-                    channel[width - x - 1, y] = 0
-                    channel[x, height - y - 1] = 0
-                    channel[width - x - 1, height - y - 1] = 0
-            if x + y >= 2 * distance:
-                this_dct_data[0][x, y] = 0
-                this_dct_data[0][width - x -1, y] = 0
-                this_dct_data[0][x, height - y -1] = 0
-                this_dct_data[0][width - x - 1, height - y - 1] = 0
-    
-    idct_data = [ ]
-    for channel_index in range(3):
-        this_idct = idctn(this_dct_data[channel_index])
-        idct_data.append(this_idct.clip(0, 255).astype(numpy.uint8))
+    numpy.less(manhattan, reach * distance, out=keep)
+    numpy.multiply(dct_stack, keep, out=frame_dct)
+
+    idct_data = progressive.update(frame_dct).clip(0, 255).astype(numpy.uint8)
 
     #idct_data[0][:] = 128
 
@@ -60,4 +71,6 @@ for distance in range(1, TOTAL_FRAMES):
     filled = int(frac * 32)
     bar = "▪" * filled + "▶" + " " * (32 - filled)
     percent = frac * 100
-    print(f'\r[{bar}] {distance} of {TOTAL_FRAMES} ({percent:.2f}%)', end='')
\ No newline at end of file
+    print(f'\r[{bar}] {distance} of {TOTAL_FRAMES} ({percent:.2f}%)', end='')
+
+print(f'\n{progressive.sparse_updates} sparse and {progressive.dense_updates} dense frames, {progressive.resyncs} resyncs')
\ No newline at end of file
@@ -1,6 +1,9 @@
-import copy, os, numpy
+import argparse, os, sys, numpy
 from PIL import Image
-from scipy.fft import dctn, idctn
+from scipy.fft import idctn
+
+sys.path.append('./2025/Mar.08')
+from mar08_dct_cache import forward_dct
 
 # dct part 2.
 # perform 2d dct on the image. zero the lower frequencies. perform inverse dct.
@@ -11,6 +14,13 @@ from scipy.fft import dctn, idctn
 # Espresso photo, uncredited
 # https://pixabay.com/photos/coffee-cappuccino-latte-espresso-4334647/
 
+# a normal run masks with input/dc_mask.webp and numbers its output from
+# input/_counter.md. --masks renders every image in a directory instead,
+# naming each output after its mask and reusing one forward transform.
+parser = argparse.ArgumentParser(description="mask the dct of japan_sq.png and save the inverse transform")
+parser.add_argument("--masks", help="directory of mask images to render in one run")
+args = parser.parse_args()
+
 img = Image.open('./2025/Mar.08/input/japan_sq.png').convert('YCbCr')
 channel_names = ['y', 'cb', 'cr']
 channels = img.split()
@@ -18,48 +28,47 @@ os.makedirs("./2025/Mar.11/debug/", exist_ok=True)
 width, height = img.size
 r_max = int(((width / 2) ** 2 + (height / 2) ** 2) ** 0.5)
 
-dct_data = [ ]
-for index in range(3):
-    name, ch = channel_names[index], channels[index]
-    this_dct = dctn(numpy.array(ch, dtype=float))
-    dct_data.append(this_dct)
+# all three channels as one (3, height, width) stack, so a mask is a single
+# broadcast multiply. the shared cache stores float32; the masking and the
+# inverse transform run in double precision as before.
+dct_stack = numpy.array(forward_dct('./2025/Mar.08/input/japan_sq.png'), dtype=float)
+os.makedirs("./2025/Mar.11/output/", exist_ok=True)
 
-this_dct_data = copy.deepcopy(dct_data)
 
-with open('./2025/Mar.11/input/_counter.md', 'r') as file:
-    counter = int(file.readline().strip())
-counter += 1
-with open('./2025/Mar.11/input/_counter.md', 'w') as file:
-    file.write(str(counter))
+def render(mask_path, name):
+    mask = Image.open(mask_path).convert('L')
+    mask_array = numpy.array(mask, dtype=float)
+    shifted_mask = numpy.roll(mask_array, shift=(height // 2, width // 2), axis=(0, 1))
+    shifted_mask_img = Image.fromarray(shifted_mask.astype(numpy.uint8))
+    shifted_mask_img.save(f'./2025/Mar.11/debug/mask {name}.webp')
 
-mask = Image.open('./2025/Mar.11/input/dc_mask.webp').convert('L')
-mask_array = numpy.array(mask, dtype=float)
-shifted_mask = numpy.roll(mask_array, shift=(height // 2, width // 2), axis=(0, 1))
-shifted_mask_img = Image.fromarray(shifted_mask.astype(numpy.uint8))
-os.makedirs("./2025/Mar.11/debug/", exist_ok=True)
-shifted_mask_img.save(f'./2025/Mar.11/debug/mask {counter:03d}.webp')
+    # coefficients under dark mask pixels are dropped, the rest kept as is.
+    masked = dct_stack * (mask_array >= 10)
+    idct_data = idctn(masked, axes=(1, 2)).clip(0, 255).astype(numpy.uint8)
 
+    #idct_data[0][:] = 128
 
-# mask 
-for x in range(int(width)):
-    for y in range(int(height)):
-        mask = 0.0 if mask_array[x, y] < 10 else 1.0
-        this_dct_data[0][x, y] *= mask
-        this_dct_data[1][x, y] *= mask
-        this_dct_data[2][x, y] *= mask
+    merged = Image.merge("YCbCr", [Image.fromarray(channel) for channel in idct_data]).convert("RGB")
+    merged.save(f'./2025/Mar.11/output/mar11 {name}.png')
 
-    frac = (1 + x) / width
-    filled = int(frac * 32)
-    bar = "▪" * filled + "▶" + " " * (32 - filled)
-    percent = frac * 100
-    print(f'\r[{bar}] {x} of {width} ({percent:.2f}%)', end='')
 
-idct_data = [ ]
-for channel_index in range(3):
-    idct_data.append(idctn(this_dct_data[channel_index]).clip(0, 255).astype(numpy.uint8))
+if args.masks:
+    mask_files = [file for file in sorted(os.listdir(args.masks))
+                  if os.path.splitext(file)[1].lower() in ('.webp', '.png', '.jpg', '.jpeg')]
+    for index, file in enumerate(mask_files):
+        render(os.path.join(args.masks, file), os.path.splitext(file)[0])
 
-#idct_data[0][:] = 128
+        frac = (1 + index) / len(mask_files)
+        filled = int(frac * 32)
+        bar = "▪" * filled + "▶" + " " * (32 - filled)
+        percent = frac * 100
+        print(f'\r[{bar}] {index + 1} of {len(mask_files)} ({percent:.2f}%)', end='')
+    print()
+else:
+    with open('./2025/Mar.11/input/_counter.md', 'r') as file:
+        counter = int(file.readline().strip())
+    counter += 1
+    with open('./2025/Mar.11/input/_counter.md', 'w') as file:
+        file.write(str(counter))
 
-merged = Image.merge("YCbCr", [Image.fromarray(channel) for channel in idct_data]).convert("RGB")
-os.makedirs("./2025/Mar.11/output/", exist_ok=True)
-merged.save(f'./2025/Mar.11/output/mar11 {counter:03d}.png')
+    render('./2025/Mar.11/input/dc_mask.webp', f'{counter:03d}')
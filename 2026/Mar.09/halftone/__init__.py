@@ -0,0 +1,80 @@
+"""The Mar.09 halftone pipeline as one importable package.
+
+The shared stages live in their own submodules:
+
+- ``halftone.engine``: separation, dithering, the block FFT filter and the ink
+  compositors
+- ``halftone.thresholds``: the threshold screens
+- ``halftone.diffusion``: error diffusion
+- ``halftone.tiled``: downsampling and banded rendering
+- ``halftone.fused``: the single-pass tile kernel
+- ``halftone.cache``: the on-disk plane cache
+- ``halftone.batch`` and ``halftone.profiling``: the batch runner and its timers
+- ``halftone.cli``: argument helpers, importable without NumPy or Pillow
+
+Each style's band renderer has a submodule too:
+
+- ``halftone.offset``: staggered Morton CMYK dots on paper
+- ``halftone.uncertainty``: offset base blended with Gabor-perturbed coverage
+- ``halftone.fftorganic``: GCR dots shaped by the 8x8 FFT band filter
+- ``halftone.gabor``: Gabor-modulated channels on white
+
+The ``mar09_*`` scripts are thin entry points over these. Names below resolve
+on first access, so ``import halftone`` itself loads neither NumPy nor Pillow.
+"""
+
+from __future__ import annotations
+
+import importlib
+
+_EXPORTS = {
+    "CMYK_INKS": "engine",
+    "MORTON_PHASES": "engine",
+    "PAPER": "engine",
+    "SEPARATIONS": "engine",
+    "apply_ink": "engine",
+    "composite_ink": "engine",
+    "composite_ink_array": "engine",
+    "dither_array": "engine",
+    "dither_channel": "engine",
+    "fft_filter_blocks_8x8_array": "engine",
+    "gabor_field_rows": "engine",
+    "gcr_cmyk_planes": "engine",
+    "ink_palette": "engine",
+    "pack_ink_bits": "engine",
+    "screen_phases": "engine",
+    "separate_cmyk": "engine",
+    "threshold_plane": "engine",
+    "rank_matrix": "thresholds",
+    "threshold_matrix": "thresholds",
+    "DOWNSAMPLE_FACTOR": "tiled",
+    "downsample": "tiled",
+    "downsample_rows": "tiled",
+    "load_planes": "tiled",
+    "render_tiled": "tiled",
+    "scaled_size": "tiled",
+    "render_fused": "fused",
+    "PlaneCache": "cache",
+    "DIFFUSION_KERNELS": "diffusion",
+    "ErrorDiffuser": "diffusion",
+    "DIFFUSIONS": "cli",
+    "ENGINES": "cli",
+    "PRECISIONS": "cli",
+    "SCREENS": "cli",
+    "infer_short_name": "cli",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str) -> object:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_EXPORTS})
@@ -0,0 +1,171 @@
+"""Parallel multi-input batch runner shared by the Mar.09 render scripts.
+
+Each script builds a list of (input, output) pairs plus its render parameters
+and hands them to ``run_batch``. Inputs are spread over ``--jobs`` processes,
+every ``Saved:`` line reports wall time and peak traced memory for that image,
+and outputs whose input hash and parameters match the last render are skipped.
+With ``ProfileOptions`` each image also gets a per-stage breakdown or a
+cProfile dump (see ``halftone.profiling``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import time
+import tracemalloc
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import NamedTuple
+
+from .profiling import ProfileOptions, format_stages, record_stages
+
+MANIFEST_NAME = ".mar09-manifest.json"
+
+# Recorded with every render. Bump when a change alters render output for the
+# same input and parameters, so outputs rendered before it are redone.
+RENDER_VERSION = 2
+
+
+class LazyRender(NamedTuple):
+    """``process_image`` of a style module, imported when first needed.
+
+    Scripts pass one to ``run_batch`` so ``--help`` and the up-to-date checks
+    never load NumPy. ``_render_one`` resolves it before its timers start, so
+    the import is not billed to the first image a process renders.
+    """
+
+    module: str
+    name: str = "process_image"
+
+    def load(self) -> Callable[..., None]:
+        render = getattr(importlib.import_module(self.module), self.name)
+        # Pillow imports its format plugins on the first Image.open; do that
+        # here as well so it does not land in the first image's load stage.
+        from PIL import Image
+
+        Image.preinit()
+        return render
+
+
+def add_batch_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Render N inputs in parallel processes (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-render outputs even when they are up to date",
+    )
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_manifest(output_dir: Path) -> dict[str, dict]:
+    try:
+        return json.loads((output_dir / MANIFEST_NAME).read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_manifest(output_dir: Path, manifest: dict[str, dict]) -> None:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tmp = output_dir / (MANIFEST_NAME + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(tmp, output_dir / MANIFEST_NAME)
+
+
+def _render_one(
+    render: Callable[..., None] | LazyRender,
+    input_path: Path,
+    output_path: Path,
+    params: dict,
+    options: dict,
+    profile: ProfileOptions | None = None,
+) -> tuple[float, int, dict[str, list]]:
+    if isinstance(render, LazyRender):
+        render = render.load()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    try:
+        with record_stages(output_path, profile) as record:
+            render(input_path=input_path, output_path=output_path, **params, **options)
+        elapsed = time.perf_counter() - t0
+        peak = max(tracemalloc.get_traced_memory()[1], record.peak)
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak, record.stages
+
+
+def run_batch(
+    style: str,
+    tasks: list[tuple[Path, Path]],
+    render: Callable[..., None] | LazyRender,
+    params: dict,
+    jobs: int = 1,
+    force: bool = False,
+    options: dict | None = None,
+    profile: ProfileOptions | None = None,
+) -> None:
+    """Render every (input, output) pair with ``render(input_path=, output_path=, **params)``.
+
+    ``render`` must be a module-level function or a ``LazyRender`` so it can
+    be sent to worker processes. The up-to-date record is kept in a manifest next to the outputs
+    and keyed by output file name. ``options`` are passed to ``render`` too but
+    are not recorded, so they must not change the output (e.g. a cache).
+    ``profile`` switches on stage timings and cProfile dumps per image.
+    """
+    options = options or {}
+    jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+
+    manifests: dict[Path, dict[str, dict]] = {}
+    todo: list[tuple[Path, Path, dict]] = []
+    for input_path, output_path in tasks:
+        manifest = manifests.setdefault(output_path.parent, _load_manifest(output_path.parent))
+        record = {
+            "style": style,
+            "render_version": RENDER_VERSION,
+            "input_sha256": file_sha256(input_path),
+            "params": params,
+        }
+        if not force and output_path.exists() and manifest.get(output_path.name) == record:
+            print(f"Up to date: {output_path}")
+            continue
+        todo.append((input_path, output_path, record))
+
+    def finished(output_path: Path, record: dict, result: tuple[float, int, dict[str, list]]) -> None:
+        elapsed, peak, stages = result
+        print(f"Saved: {output_path} ({elapsed:.2f} s, peak {peak / (1 << 20):.1f} MiB)")
+        if profile is not None and profile.timings:
+            print(format_stages(output_path, stages, elapsed, profile.timings))
+        if profile is not None and profile.cprofile:
+            print(f"Profile: {output_path.with_suffix('.prof')}")
+        manifests[output_path.parent][output_path.name] = record
+        _save_manifest(output_path.parent, manifests[output_path.parent])
+
+    if jobs == 1 or len(todo) <= 1:
+        for input_path, output_path, record in todo:
+            finished(output_path, record, _render_one(render, input_path, output_path, params, options, profile))
+        return
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(todo))) as pool:
+        futures = {
+            pool.submit(_render_one, render, input_path, output_path, params, options, profile): (output_path, record)
+            for input_path, output_path, record in todo
+        }
+        for future in as_completed(futures):
+            output_path, record = futures[future]
+            finished(output_path, record, future.result())
@@ -0,0 +1,123 @@
+"""Content-addressed on-disk cache of the downsampled CMYK planes.
+
+Downsampling and CMYK separation are the shared front half of every Mar.09
+style, so rendering one photo in several styles used to redo them per script.
+Entries are (4, h, w) uint8 ``.npy`` files named after the input file's
+SHA-256, the separation mode and the downsample factor, and are opened with
+``mmap_mode="r"`` so a band only pages in the rows it reads. A hit refreshes
+the file's mtime; once the directory grows past the size cap the entries with
+the oldest mtime are deleted first.
+
+NumPy is imported on first use so the scripts can build a ``PlaneCache``
+while still parsing arguments.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .batch import file_sha256
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Bump when the downsample or separation output changes for the same key.
+CACHE_VERSION = 3
+
+
+@lru_cache(maxsize=64)
+def _digest(path: str, mtime_ns: int, size: int) -> str:
+    return file_sha256(Path(path))
+
+
+def input_digest(path: Path) -> str:
+    """SHA-256 of ``path``, memoized per process on (path, mtime, size)."""
+    st = path.stat()
+    return _digest(str(path.resolve()), st.st_mtime_ns, st.st_size)
+
+
+class PlaneCache:
+    """Directory of memory-mappable CMYK plane stacks with an LRU size cap."""
+
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> PlaneCache | None:
+        if args.cache_dir is None:
+            return None
+        return cls(args.cache_dir, args.cache_max_mb << 20)
+
+    def path_for(self, input_path: Path, separation: str, factor: float) -> Path:
+        return self.root / f"{input_digest(input_path)}-{separation}-x{factor:g}-v{CACHE_VERSION}.npy"
+
+    def load(self, path: Path, shape: tuple[int, ...]) -> np.ndarray | None:
+        """Memory-map a cached stack, or return None if it is missing or stale."""
+        import numpy as np
+
+        try:
+            planes = np.load(path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        if planes.shape != shape or planes.dtype != np.uint8:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return planes
+
+    def create(self, path: Path, shape: tuple[int, ...]) -> tuple[np.ndarray, Path]:
+        """Open a writable memmap for ``path`` under a temporary name."""
+        import numpy as np
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npy")
+        planes = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.uint8, shape=shape)
+        return planes, tmp
+
+    def commit(self, tmp: Path, path: Path) -> None:
+        """Publish a stack filled through ``create`` and enforce the size cap.
+
+        The caller must have flushed and dropped its memmap first.
+        """
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            # Another process published the same key and has it mapped.
+            self.discard(tmp)
+        self.evict(keep=path)
+
+    def discard(self, tmp: Path) -> None:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+    def evict(self, keep: Path | None = None) -> None:
+        entries = []
+        for entry in self.root.glob("*.npy"):
+            if entry.name.endswith(".tmp.npy"):
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if entry == keep:
+                continue
+            try:
+                entry.unlink()
+            except OSError:
+                continue
+            total -= size
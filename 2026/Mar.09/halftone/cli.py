@@ -0,0 +1,118 @@
+"""Command-line pieces shared by the Mar.09 style scripts.
+
+Nothing here imports NumPy or Pillow, so a script can build its parser,
+answer ``--help`` and skip up-to-date outputs before any of the pipeline is
+loaded. The batch and profiling options live with ``halftone.batch`` and
+``halftone.profiling``, which are just as light.
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+ENGINES = ("auto", "numpy", "numba")
+PRECISIONS = ("float64", "float32")
+SCREENS = ("morton", "bayer", "hilbert", "blue")
+DIFFUSIONS = ("floyd-steinberg", "jarvis")
+
+
+def infer_short_name(input_path: Path) -> str:
+    stem = input_path.stem.lower()
+    if "cheetah" in stem:
+        return "cheetah"
+    if "tenerife" in stem:
+        return "tenerife"
+    token = "".join(ch if ch.isalnum() else "-" for ch in stem).strip("-")
+    return token or "image"
+
+
+def add_tiled_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--band-rows",
+        type=int,
+        default=0,
+        help="Render in bands of N downsampled rows (multiple of 8) streamed to the PNG; 0 = whole image",
+    )
+
+
+def add_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Reuse downsampled CMYK planes across runs and scripts from this directory",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=2048,
+        help="Evict least recently used cache entries beyond this size",
+    )
+
+
+def add_fused_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--fused",
+        nargs="?",
+        const="auto",
+        default=None,
+        choices=ENGINES,
+        help="Render with the single-pass tile kernel (auto = Numba when installed, else NumPy)",
+    )
+
+
+def add_precision_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--precision",
+        choices=PRECISIONS,
+        default="float64",
+        help="Ink compositor arithmetic; float32 trades exact output for speed",
+    )
+
+
+def add_paletted_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--paletted",
+        action="store_true",
+        help="Write a 16-colour paletted PNG (same pixels, smaller and faster to encode)",
+    )
+
+
+def add_screen_arguments(parser: argparse.ArgumentParser) -> None:
+    def screen_size(text: str) -> int:
+        n = int(text)
+        if n < 2 or n & (n - 1):
+            parser.error(f"argument --screen-size: expected a power of two >= 2, got {n}")
+        return n
+
+    parser.add_argument(
+        "--screen",
+        choices=SCREENS,
+        default="morton",
+        help="Ordered-dither threshold matrix (blue = void-and-cluster blue noise)",
+    )
+    parser.add_argument(
+        "--screen-size",
+        type=screen_size,
+        default=8,
+        help="Threshold matrix edge in pixels, a power of two; built once and cached as .npy",
+    )
+
+
+def add_diffusion_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--diffusion",
+        choices=DIFFUSIONS,
+        default=None,
+        help="Error-diffuse the CMYK channels instead of thresholding them against the screen",
+    )
+
+
+def add_downsample_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--downsample",
+        type=float,
+        default=2.0,
+        help="Reduce the input this many times before separation; whole numbers area-average, others resize bilinearly",
+    )
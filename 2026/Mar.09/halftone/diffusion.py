@@ -0,0 +1,239 @@
+"""Error-diffusion dithering for CMYK channel stacks.
+
+Error diffusion is sequential: a pixel's value is only final once every
+neighbour upstream of it has pushed its quantization error forward. Two
+engines get around the per-pixel Python loop:
+
+- "numpy": a wavefront sweep. With a slope ``k`` at least the kernel's width,
+  every pixel on the line ``k * y + x = t`` depends only on lines before
+  ``t``, so each line is thresholded and spreads its error in a handful of
+  array operations over all four channels at once.
+- "numba": the plain raster loop, JIT-compiled with one channel per thread.
+
+Both add the error contributions to each pixel in the same order, so they
+produce the same dots. Error leaving the left or right edge is dropped; the
+error rows below a band are carried into the next one, so banded renders
+match whole-image renders.
+
+``main`` (run as ``python mar09_diffusion.py``) checks the engines against each
+other and banded against whole-image diffusion, and prints their timings.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from .cli import DIFFUSIONS
+from .fused import resolve_engine
+
+try:
+    import numba
+
+    prange = numba.prange
+except ImportError:
+    numba = None
+    prange = range
+
+# (dy, dx, weight) taps of each kernel, as fractions of the pixel's error.
+DIFFUSION_KERNELS = {
+    "floyd-steinberg": (
+        (0, 1, 7 / 16),
+        (1, -1, 3 / 16),
+        (1, 0, 5 / 16),
+        (1, 1, 1 / 16),
+    ),
+    "jarvis": (
+        (0, 1, 7 / 48),
+        (0, 2, 5 / 48),
+        (1, -2, 3 / 48),
+        (1, -1, 5 / 48),
+        (1, 0, 7 / 48),
+        (1, 1, 5 / 48),
+        (1, 2, 3 / 48),
+        (2, -2, 1 / 48),
+        (2, -1, 3 / 48),
+        (2, 0, 5 / 48),
+        (2, 1, 3 / 48),
+        (2, 2, 1 / 48),
+    ),
+}
+
+# Ink values (0..255) at or above this print a dot.
+THRESHOLD = 128.0
+
+
+class _Kernel:
+    """A diffusion kernel unpacked for both engines."""
+
+    def __init__(self, name: str) -> None:
+        if name not in DIFFUSION_KERNELS:
+            raise ValueError(f"Unknown diffusion kernel {name!r}; expected one of {DIFFUSIONS}")
+        # Deeper taps first: within one wavefront line the contributions then
+        # land in raster order, matching the Numba loop bit for bit.
+        taps = sorted(DIFFUSION_KERNELS[name], key=lambda tap: -tap[0])
+        self.dy = np.array([tap[0] for tap in taps], dtype=np.int64)
+        self.dx = np.array([tap[1] for tap in taps], dtype=np.int64)
+        self.weights = np.array([tap[2] for tap in taps], dtype=np.float32)
+        self.rows = int(self.dy.max())
+        self.pad = int(np.abs(self.dx).max())
+        # Wide enough that every source of a pixel lies on an earlier line,
+        # and that lines visit sources in raster order.
+        self.slope = int(self.dx.max() - self.dx.min())
+
+
+def _diffuse_numpy(values: np.ndarray, err: np.ndarray, kernel: _Kernel) -> np.ndarray:
+    """Wavefront sweep over a (c, h, w) float32 stack; ``err`` is padded and updated in place."""
+    n, h, w = values.shape
+    row = w + 2 * kernel.pad
+    flat_values = values.reshape(n, h * w)
+    flat_err = err.reshape(n, -1)
+    dots = np.zeros((n, h * w), dtype=bool)
+    offsets = [int(offset) for offset in kernel.dy * row + kernel.dx]
+    weights = [np.float32(weight) for weight in kernel.weights]
+    slope = kernel.slope
+    ink = np.float32(255.0)
+
+    for t in range(slope * (h - 1) + w):
+        y_lo = max(0, -(-(t - w + 1) // slope))
+        y_hi = min(h - 1, t // slope)
+        count = y_hi - y_lo + 1
+        if count <= 0:
+            # Images narrower than the slope leave some lines empty.
+            continue
+        # Along a line the flat indices step by (w - slope) in the values and
+        # (row - slope) in the padded errors, so plain strided slices (views,
+        # not fancy-index copies) address it.
+        x_lo = t - slope * y_lo
+        src_step = w - slope
+        err_step = row - slope
+        src = slice(y_lo * w + x_lo, y_lo * w + x_lo + (count - 1) * src_step + 1, max(src_step, 1))
+        at = y_lo * row + x_lo + kernel.pad
+        span = (count - 1) * err_step + 1
+        step = max(err_step, 1)
+
+        v = flat_values[:, src] + flat_err[:, at : at + span : step]
+        dot = v >= THRESHOLD
+        dots[:, src] = dot
+        v -= dot * ink
+        for offset, weight in zip(offsets, weights):
+            flat_err[:, at + offset : at + offset + span : step] += weight * v
+
+    return dots.reshape(n, h, w)
+
+
+def _diffuse_kernel(values, err, dy, dx, weights, pad, dots):
+    """Raster loop shared by the Numba engine and the self-check.
+
+    Channels are independent, so they run as parallel iterations.
+    """
+    n, h, w = values.shape
+    for c in prange(n):
+        for y in range(h):
+            for x in range(w):
+                v = values[c, y, x] + err[c, y, x + pad]
+                dot = v >= THRESHOLD
+                e = v - np.float32(255.0) if dot else v
+                dots[c, y, x] = dot
+                for k in range(weights.shape[0]):
+                    err[c, y + dy[k], x + pad + dx[k]] += weights[k] * e
+
+
+_diffuse_kernel_jit = numba.njit(cache=True, parallel=True)(_diffuse_kernel) if numba is not None else None
+
+
+class ErrorDiffuser:
+    """Error-diffuses consecutive bands of a (c, h, w) channel stack.
+
+    Call it with each band and the image row of its first row; the error
+    pushed below one band seeds the next, and a band at row 0 starts over.
+    """
+
+    def __init__(self, kernel: str = "floyd-steinberg", engine: str = "auto") -> None:
+        self.kernel = _Kernel(kernel)
+        self.engine = resolve_engine(engine)
+        self._carry: np.ndarray | None = None
+        self._next_row = 0
+
+    def __call__(self, values: np.ndarray, y0: int = 0) -> np.ndarray:
+        """Dots of rows [y0, y0 + h) as 0/255 uint8, the scale of the input values.
+
+        Every screen threshold lies in 1..255, so the styles can pass these
+        dots through their usual dither and composite paths unchanged.
+        """
+        if y0 != 0 and y0 != self._next_row:
+            raise ValueError(f"Bands must be diffused in order: expected row {self._next_row}, got {y0}")
+        n, h, w = values.shape
+        kernel = self.kernel
+        err = np.zeros((n, h + kernel.rows, w + 2 * kernel.pad), dtype=np.float32)
+        if y0 != 0 and self._carry is not None:
+            err[:, : kernel.rows] = self._carry
+
+        values = np.ascontiguousarray(values, dtype=np.float32)
+        if self.engine == "numpy":
+            dots = _diffuse_numpy(values, err, kernel)
+        else:
+            dots = np.empty(values.shape, dtype=bool)
+            _diffuse_kernel_jit(values, err, kernel.dy, kernel.dx, kernel.weights, kernel.pad, dots)
+
+        self._carry = err[:, h:].copy()
+        self._next_row = y0 + h
+        return dots.view(np.uint8) * np.uint8(255)
+
+
+def _diffuse_python(values: np.ndarray, kernel: str) -> np.ndarray:
+    k = _Kernel(kernel)
+    n, h, w = values.shape
+    err = np.zeros((n, h + k.rows, w + 2 * k.pad), dtype=np.float32)
+    dots = np.empty(values.shape, dtype=bool)
+    _diffuse_kernel(values.astype(np.float32), err, k.dy, k.dx, k.weights, k.pad, dots)
+    return dots.view(np.uint8) * np.uint8(255)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check the Mar.09 error-diffusion engines")
+    parser.add_argument("--width", type=int, default=960)
+    parser.add_argument("--height", type=int, default=640)
+    parser.add_argument("--band-rows", type=int, default=64)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 256, (4, args.height, args.width), dtype=np.uint8)
+    crop = values[:, :29, :41]
+    failed = False
+    print(f"Size: {args.width}x{args.height}, numba {'available' if numba is not None else 'not installed'}")
+
+    for kernel in DIFFUSIONS:
+        reference = _diffuse_python(crop, kernel)
+        match = np.array_equal(ErrorDiffuser(kernel, "numpy")(crop), reference)
+        failed |= not match
+        print(f"{kernel:16s} python kernel  match={'yes' if match else 'NO'}")
+
+        for engine in ["numpy"] + (["numba"] if numba is not None else []):
+            ErrorDiffuser(kernel, engine)(crop)  # warm up / compile
+            t0 = time.perf_counter()
+            whole = ErrorDiffuser(kernel, engine)(values)
+            elapsed = time.perf_counter() - t0
+
+            diffuser = ErrorDiffuser(kernel, engine)
+            banded = np.concatenate(
+                [diffuser(values[:, y0 : y0 + args.band_rows], y0) for y0 in range(0, args.height, args.band_rows)],
+                axis=1,
+            )
+            match = np.array_equal(whole, banded)
+            failed |= not match
+            # Diffusion preserves the mean tone up to the error lost at the edges.
+            drift = abs(float(whole.mean()) - float(values.mean()))
+            print(
+                f"{kernel:16s} {engine:6s} {elapsed * 1000.0:8.1f} ms  "
+                f"banded match={'yes' if match else 'NO'}  tone drift={drift:.2f}"
+            )
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
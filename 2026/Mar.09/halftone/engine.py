@@ -0,0 +1,539 @@
+"""Shared NumPy engine for the Mar.09 Morton CMYK renderers.
+
+The ordered dither builds one tiled threshold plane per (size, phase) and
+thresholds a whole channel with a single array comparison. Gabor fields are
+built in closed form per image size and memoized. The 8x8 block FFT filter
+runs every block of every plane through one batched transform. The ink
+compositor applies the paper/ink transmittance model to whole coverage planes.
+
+``main`` (run as ``python mar09_halftone.py``) checks the engine against the
+original per-pixel loops and reports the speedup.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import time
+from collections.abc import Sequence
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image
+
+from .cli import PRECISIONS
+from .thresholds import morton_ranks, threshold_matrix
+
+
+# Off-white paper base.
+PAPER = (0.965, 0.945, 0.900)
+
+# Per-ink transmittance (multiplicative) at full coverage.
+CYAN_T = (0.25, 0.98, 0.98)
+MAGENTA_T = (0.98, 0.30, 0.98)
+YELLOW_T = (0.98, 0.98, 0.35)
+BLACK_T = (0.30, 0.30, 0.30)
+CMYK_INKS = (CYAN_T, MAGENTA_T, YELLOW_T, BLACK_T)
+
+# (x_phase, y_phase) of the staggered Morton screen for C, M, Y, K.
+MORTON_PHASES = ((0, 0), (4, 0), (0, 4), (4, 4))
+
+# CMYK separations: PIL's plain RGB->CMYK (K = 0) or GCR black generation.
+SEPARATIONS = ("pil", "gcr")
+
+
+def screen_phases(screen_size: int) -> tuple[tuple[int, int], ...]:
+    """C, M, Y, K phases for an N x N screen: ``MORTON_PHASES`` scaled to N."""
+    half = screen_size // 2
+    return ((0, 0), (half, 0), (0, half), (half, half))
+
+
+def gcr_cmyk_planes(rgb_img: Image.Image) -> np.ndarray:
+    """Convert RGB to CMYK with explicit black generation (GCR-style).
+
+    Returns a (4, h, w) uint8 C, M, Y, K stack.
+    """
+    rgb = np.array(rgb_img.convert("RGB"), dtype=np.float32) / 255.0
+
+    c = 1.0 - rgb[..., 0]
+    m = 1.0 - rgb[..., 1]
+    y = 1.0 - rgb[..., 2]
+
+    # Generate K from shared darkness and remove it from chroma inks.
+    k = np.minimum(np.minimum(c, m), y)
+    c = np.clip(c - k, 0.0, 1.0)
+    m = np.clip(m - k, 0.0, 1.0)
+    y = np.clip(y - k, 0.0, 1.0)
+
+    return (np.stack([c, m, y, k]) * 255.0).astype(np.uint8)
+
+
+def separate_cmyk(rgb_img: Image.Image, separation: str) -> np.ndarray:
+    """Separate an RGB image into a (4, h, w) uint8 C, M, Y, K stack."""
+    if separation == "pil":
+        return np.asarray(rgb_img.convert("CMYK")).transpose(2, 0, 1).copy()
+    if separation == "gcr":
+        return gcr_cmyk_planes(rgb_img)
+    raise ValueError(f"Unknown separation {separation!r}; expected one of {SEPARATIONS}")
+
+
+@lru_cache(maxsize=16)
+def threshold_plane(
+    w: int,
+    h: int,
+    x_phase: int,
+    y_phase: int,
+    screen: str = "morton",
+    screen_size: int = 8,
+) -> np.ndarray:
+    """Full (h, w) threshold plane for one channel of an N x N screen.
+
+    Every second N-row block is shifted right by N/2 pixels (half-block row
+    stagger), so the pattern repeats every 2N rows and N columns. One 2N x N
+    tile is built and repeated over the plane.
+    """
+    n = screen_size
+    thresholds = threshold_matrix(screen, n)
+    py = np.arange(2 * n) + y_phase
+    row_offset = np.where((py // n) & 1, n // 2, 0)
+    cols = (np.arange(n)[np.newaxis, :] + x_phase + row_offset[:, np.newaxis]) % n
+    tile = thresholds[(py % n)[:, np.newaxis], cols]
+
+    reps_y = -(-h // (2 * n))
+    reps_x = -(-w // n)
+    plane = np.tile(tile, (reps_y, reps_x))[:h, :w]
+    plane.setflags(write=False)
+    return plane
+
+
+def dither_array(
+    values: np.ndarray,
+    x_phase: int,
+    y_phase: int,
+    y_origin: int = 0,
+    screen: str = "morton",
+    screen_size: int = 8,
+) -> np.ndarray:
+    """Threshold an (h, w) array against a staggered threshold plane.
+
+    ``values`` may be uint8 or float on the 0..255 scale. ``y_origin`` is the
+    image row of ``values[0]`` when dithering a band. ``screen`` and
+    ``screen_size`` pick the matrix from ``halftone.thresholds``. Returns a bool
+    mask.
+    """
+    h, w = values.shape
+    # The plane repeats every N columns and 2N rows; normalizing the phases
+    # lets every band of a tiled render share the cached planes.
+    n = screen_size
+    return values >= threshold_plane(w, h, x_phase % n, (y_phase + y_origin) % (2 * n), screen, n)
+
+
+def dither_channel(
+    channel: Image.Image,
+    x_phase: int,
+    y_phase: int,
+    y_origin: int = 0,
+    screen: str = "morton",
+    screen_size: int = 8,
+) -> Image.Image:
+    bits = dither_array(np.asarray(channel, dtype=np.uint8), x_phase, y_phase, y_origin, screen, screen_size)
+    return Image.fromarray(bits)
+
+
+def gabor_value(x: int, y: int, w: int, h: int, freq: float, sigma: float, theta_rad: float, phase: float) -> float:
+    cx = (x + 0.5) - (w * 0.5)
+    cy = (y + 0.5) - (h * 0.5)
+
+    xr = cx * math.cos(theta_rad) + cy * math.sin(theta_rad)
+    yr = -cx * math.sin(theta_rad) + cy * math.cos(theta_rad)
+
+    gauss = math.exp(-0.5 * (xr * xr + yr * yr) / (sigma * sigma))
+    carrier = math.cos(2.0 * math.pi * freq * xr + phase)
+    return gauss * carrier
+
+
+def _gabor_rows(
+    w: int, h: int, freq: float, sigma: float, theta_rad: float, phase: float, y0: int, y1: int
+) -> np.ndarray:
+    cx = (np.arange(w, dtype=np.float64) + 0.5) - (w * 0.5)
+    cy = (np.arange(y0, y1, dtype=np.float64) + 0.5) - (h * 0.5)
+    cos_t = math.cos(theta_rad)
+    sin_t = math.sin(theta_rad)
+
+    xr = cx[np.newaxis, :] * cos_t + cy[:, np.newaxis] * sin_t
+    yr = -cx[np.newaxis, :] * sin_t + cy[:, np.newaxis] * cos_t
+
+    field = np.exp(-0.5 * (xr * xr + yr * yr) / (sigma * sigma))
+    field *= np.cos(2.0 * math.pi * freq * xr + phase)
+    return field.astype(np.float32)
+
+
+# Whole fields are image-sized float32, so the cache holds one render's four
+# CMYK angles and no more: at print sizes each entry is hundreds of MB.
+@lru_cache(maxsize=4)
+def gabor_field(w: int, h: int, freq: float, sigma: float, theta_rad: float, phase: float) -> np.ndarray:
+    """Whole (h, w) Gabor field centred on the image, as read-only float32.
+
+    Same formula as ``gabor_value``, evaluated in float64 on broadcast pixel
+    centres and stored as float32. The four most recent fields are memoized,
+    so the CMYK angles of a render and repeated renders at one size are built
+    once.
+    """
+    field = _gabor_rows(w, h, freq, sigma, theta_rad, phase, 0, h)
+    field.setflags(write=False)
+    return field
+
+
+def gabor_field_rows(
+    w: int, h: int, freq: float, sigma: float, theta_rad: float, phase: float, y0: int, y1: int
+) -> np.ndarray:
+    """Rows [y0, y1) of the (h, w) Gabor field.
+
+    The whole-image case comes from the ``gabor_field`` cache; bands of a
+    tiled render are computed on demand so the full field is never held.
+    """
+    if y0 == 0 and y1 == h:
+        return gabor_field(w, h, freq, sigma, theta_rad, phase)
+    return _gabor_rows(w, h, freq, sigma, theta_rad, phase, y0, y1)
+
+
+@lru_cache(maxsize=32)
+def fft_band_keep_8x8(low_max: float, high_min: float, high_max: float) -> np.ndarray:
+    """Radial band mask for an 8x8 spectrum, in unshifted (fft2) order.
+
+    Keeps radius <= low_max plus the band high_min <= radius <= high_max,
+    measured from the centre of the fftshift-ed spectrum.
+    """
+    yy, xx = np.mgrid[0:8, 0:8]
+    rr = np.sqrt((yy - 3.5) ** 2 + (xx - 3.5) ** 2)
+    keep = (rr <= low_max) | ((rr >= high_min) & (rr <= high_max))
+    keep = np.fft.ifftshift(keep)
+    keep.setflags(write=False)
+    return keep
+
+
+def fft_filter_blocks_8x8_array(
+    planes: np.ndarray,
+    low_max: float,
+    high_min: float,
+    high_max: float,
+) -> np.ndarray:
+    """Block FFT band filter over (..., h, w) coverage planes in [0, 1].
+
+    Planes are zero-padded up to a multiple of 8 (the same padding the
+    per-block version applies to ragged edge blocks), viewed as
+    (..., h/8, w/8, 8, 8) and sent through a single batched fft2/ifft2. Any
+    leading axes, such as a (4, h, w) CMYK stack, are processed in the same
+    call. Returns float32 clipped to [0, 1] with the input's shape.
+    """
+    arr = np.asarray(planes, dtype=np.float32)
+    *lead, h, w = arr.shape
+    ph = -(-h // 8) * 8
+    pw = -(-w // 8) * 8
+    if (ph, pw) != (h, w):
+        padded = np.zeros((*lead, ph, pw), dtype=np.float32)
+        padded[..., :h, :w] = arr
+        arr = padded
+
+    blocks = arr.reshape(*lead, ph // 8, 8, pw // 8, 8).swapaxes(-3, -2)
+    spec = np.fft.fft2(blocks)
+    spec *= fft_band_keep_8x8(low_max, high_min, high_max)
+    recon = np.real(np.fft.ifft2(spec))
+    recon = np.clip(recon, 0.0, 1.0).astype(np.float32, copy=False)
+
+    out = recon.swapaxes(-3, -2).reshape(*lead, ph, pw)
+    return np.ascontiguousarray(out[..., :h, :w])
+
+
+def apply_ink(r: float, g: float, b: float, cov: float, trans: tuple[float, float, float]) -> tuple[float, float, float]:
+    # Continuous coverage interpolation from no-ink (1.0) to full ink transmittance.
+    r *= 1.0 - cov * (1.0 - trans[0])
+    g *= 1.0 - cov * (1.0 - trans[1])
+    b *= 1.0 - cov * (1.0 - trans[2])
+    return r, g, b
+
+
+def pack_ink_bits(masks: Sequence[np.ndarray]) -> np.ndarray:
+    """Per-pixel palette index with bit i set where mask i has a dot."""
+    masks = [np.asarray(mask) for mask in masks]
+    index = np.zeros(masks[0].shape, dtype=np.uint8)
+    for bit, mask in enumerate(masks):
+        # != 0 normalizes PIL mode "1" arrays, whose True bytes are 255.
+        index |= np.not_equal(mask, 0).view(np.uint8) << np.uint8(bit)
+    return index
+
+
+@lru_cache(maxsize=32)
+def _ink_palette(
+    inks: tuple[tuple[float, float, float], ...],
+    paper: tuple[float, float, float],
+    rounding: str,
+) -> np.ndarray:
+    index = np.arange(1 << len(inks))
+    masks = [((index >> bit) & 1).astype(bool)[np.newaxis] for bit in range(len(inks))]
+    # Only 2**len(inks) entries, so the exact float64 arithmetic costs nothing
+    # and is quantized to 8 bits once, whatever the compositor precision.
+    palette = _composite_ink_direct(masks, inks, paper, rounding, "float64")[0]
+    palette.setflags(write=False)
+    return palette
+
+
+def ink_palette(
+    inks: Sequence[tuple[float, float, float]] = CMYK_INKS,
+    paper: tuple[float, float, float] = PAPER,
+    rounding: str = "round",
+) -> np.ndarray:
+    """(2**len(inks), 3) uint8 RGB of every on/off ink combination.
+
+    Entry i is what the float64 compositor produces for a pixel whose dots
+    match the bits of i (see ``pack_ink_bits``), computed with the same
+    arithmetic, so a palette lookup is identical to compositing the masks.
+    """
+    return _ink_palette(tuple(tuple(ink) for ink in inks), tuple(paper), rounding)
+
+
+def composite_ink_array(
+    coverage: Sequence[np.ndarray],
+    inks: Sequence[tuple[float, float, float]] = CMYK_INKS,
+    paper: tuple[float, float, float] = PAPER,
+    rounding: str = "round",
+    precision: str = "float64",
+) -> np.ndarray:
+    """Composite CMYK coverage planes into an (h, w, 3) uint8 RGB array.
+
+    Bool and integer planes are binary masks (non-zero = dot present) and
+    multiply in the ink transmittance directly. Float planes are continuous
+    coverage in [0, 1] and go through the ``apply_ink`` interpolation. With the
+    default float64 ``precision`` the arithmetic runs in the same order as the
+    per-pixel model, so the result is identical to it; see ``PRECISIONS`` for
+    the faster approximate mode. When every plane is binary each pixel is one
+    of 16 ink combinations, so the RGB is gathered from the float64
+    ``ink_palette`` and is exact at every precision.
+
+    ``rounding`` is "round" (round half to even, then clamp) or "truncate"
+    (``int()`` of the scaled value).
+    """
+    if rounding not in ("round", "truncate"):
+        raise ValueError(f"Unknown rounding mode: {rounding!r}")
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision {precision!r}; expected one of {PRECISIONS}")
+
+    planes = [np.asarray(plane) for plane in coverage]
+    if len(planes) <= 8 and all(plane.dtype.kind in "biu" for plane in planes):
+        return ink_palette(inks, paper, rounding)[pack_ink_bits(planes)]
+    return _composite_ink_direct(planes, inks, paper, rounding, precision)
+
+
+def _composite_ink_direct(
+    planes: list[np.ndarray],
+    inks: Sequence[tuple[float, float, float]],
+    paper: tuple[float, float, float],
+    rounding: str,
+    precision: str,
+) -> np.ndarray:
+    # float64 is the reference (identical to the per-pixel model); float32
+    # halves the working set.
+    dtype = np.float64 if precision == "float64" else np.float32
+    h, w = planes[0].shape
+    out = np.empty((h, w, 3), dtype=np.uint8)
+    value = np.empty((h, w), dtype=dtype)
+    scratch = np.empty((h, w), dtype=dtype)
+
+    for band in range(3):
+        value.fill(paper[band])
+        for plane, trans in zip(planes, inks):
+            if plane.dtype.kind in "biu":
+                np.multiply(value, trans[band], out=value, where=plane.astype(bool, copy=False))
+            else:
+                np.multiply(plane, 1.0 - trans[band], out=scratch, dtype=dtype)
+                np.subtract(1.0, scratch, out=scratch)
+                value *= scratch
+
+        value *= 255.0
+        if rounding == "round":
+            np.rint(value, out=value)
+        np.clip(value, 0.0, 255.0, out=value)
+        out[..., band] = value
+
+    return out
+
+
+def composite_ink(
+    coverage: Sequence[np.ndarray],
+    inks: Sequence[tuple[float, float, float]] = CMYK_INKS,
+    paper: tuple[float, float, float] = PAPER,
+    rounding: str = "round",
+    precision: str = "float64",
+) -> Image.Image:
+    return Image.fromarray(composite_ink_array(coverage, inks, paper, rounding, precision))
+
+
+def _dither_channel_loop(channel: Image.Image, x_phase: int, y_phase: int) -> Image.Image:
+    """Original per-pixel 8x8 Morton dither, kept as the reference for the check."""
+    thresholds = [[int((rank + 0.5) * 4.0) for rank in row] for row in morton_ranks(8).tolist()]
+    w, h = channel.size
+    src = channel.load()
+
+    out = Image.new("1", (w, h))
+    dst = out.load()
+
+    for y in range(h):
+        py = y + y_phase
+        ty = py & 7
+        row_offset = 4 if ((py >> 3) & 1) else 0
+
+        for x in range(w):
+            tx = (x + x_phase + row_offset) & 7
+            dst[x, y] = 255 if src[x, y] >= thresholds[ty][tx] else 0
+
+    return out
+
+
+def _composite_ink_loop(
+    coverage: Sequence[np.ndarray],
+    inks: Sequence[tuple[float, float, float]],
+    rounding: str,
+) -> Image.Image:
+    """Original per-pixel compositor, kept as the reference for the check."""
+    h, w = coverage[0].shape
+    out = Image.new("RGB", (w, h))
+    dst = out.load()
+    binary = coverage[0].dtype == bool
+
+    for y0 in range(h):
+        for x0 in range(w):
+            r, g, b = PAPER
+            for plane, trans in zip(coverage, inks):
+                if binary:
+                    if plane[y0, x0]:
+                        r *= trans[0]
+                        g *= trans[1]
+                        b *= trans[2]
+                else:
+                    r, g, b = apply_ink(r, g, b, float(plane[y0, x0]), trans)
+
+            if rounding == "round":
+                dst[x0, y0] = (
+                    int(max(0, min(255, round(r * 255.0)))),
+                    int(max(0, min(255, round(g * 255.0)))),
+                    int(max(0, min(255, round(b * 255.0)))),
+                )
+            else:
+                dst[x0, y0] = (int(r * 255.0), int(g * 255.0), int(b * 255.0))
+
+    return out
+
+
+def _fft_filter_blocks_8x8_loop(arr: np.ndarray, low_max: float, high_min: float, high_max: float) -> np.ndarray:
+    """Original per-block filter, kept as the reference for the check."""
+    h, w = arr.shape
+    out = np.zeros_like(arr, dtype=np.float32)
+
+    yy, xx = np.mgrid[0:8, 0:8]
+    rr = np.sqrt((yy - 3.5) ** 2 + (xx - 3.5) ** 2)
+    keep = (rr <= low_max) | ((rr >= high_min) & (rr <= high_max))
+
+    for y0 in range(0, h, 8):
+        for x0 in range(0, w, 8):
+            y1 = min(y0 + 8, h)
+            x1 = min(x0 + 8, w)
+            block = arr[y0:y1, x0:x1]
+
+            pad = np.zeros((8, 8), dtype=np.float32)
+            pad[: block.shape[0], : block.shape[1]] = block
+
+            spec = np.fft.fftshift(np.fft.fft2(pad))
+            spec *= keep
+            recon = np.real(np.fft.ifft2(np.fft.ifftshift(spec)))
+            recon = np.clip(recon, 0.0, 1.0)
+
+            out[y0:y1, x0:x1] = recon[: block.shape[0], : block.shape[1]]
+
+    return out
+
+
+def _timed(fn, repeat: int = 1) -> tuple[object, float]:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - t0) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Check the vectorized Mar.09 stages against the per-pixel loops"
+    )
+    parser.add_argument("--width", type=int, default=960)
+    parser.add_argument("--height", type=int, default=640)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    channel = Image.fromarray(rng.integers(0, 256, (args.height, args.width), dtype=np.uint8))
+    phases = MORTON_PHASES
+    print(f"Size: {args.width}x{args.height}, 4 channels")
+    failed = False
+
+    def report(stage: str, exact: bool, loop_s: float, fast_s: float) -> None:
+        print(
+            f"{stage:22s} match={'yes' if exact else 'NO ':3s} "
+            f"loop={loop_s * 1000.0:9.1f} ms  numpy={fast_s * 1000.0:8.1f} ms  "
+            f"({loop_s / fast_s:.0f}x)"
+        )
+
+    reference, loop_s = _timed(lambda: [_dither_channel_loop(channel, xp, yp) for xp, yp in phases])
+    # Cold call includes building the threshold planes.
+    threshold_plane.cache_clear()
+    fast_dither, cold_s = _timed(lambda: [dither_channel(channel, xp, yp) for xp, yp in phases])
+    _, warm_s = _timed(lambda: [dither_channel(channel, xp, yp) for xp, yp in phases], args.repeat)
+    exact = all(a.tobytes() == b.tobytes() for a, b in zip(reference, fast_dither))
+    report("dither (cold)", exact, loop_s, cold_s)
+    report("dither (warm)", exact, loop_s, warm_s)
+    failed |= not exact
+
+    sigma = max(1.0, min(args.width, args.height) * 0.03125)
+    theta = math.radians(67.5)
+    reference, loop_s = _timed(
+        lambda: np.array(
+            [
+                [gabor_value(x, y, args.width, args.height, 0.018, sigma, theta, math.pi / 2.0) for x in range(args.width)]
+                for y in range(args.height)
+            ]
+        )
+    )
+    gabor_field.cache_clear()
+    fast, cold_s = _timed(lambda: gabor_field(args.width, args.height, 0.018, sigma, theta, math.pi / 2.0))
+    _, warm_s = _timed(lambda: gabor_field(args.width, args.height, 0.018, sigma, theta, math.pi / 2.0), args.repeat)
+    # float32 storage: compare at float32 resolution.
+    exact = bool(np.allclose(reference, fast, rtol=0.0, atol=1e-6))
+    report("gabor field (cold)", exact, loop_s, cold_s)
+    report("gabor field (cached)", exact, loop_s, warm_s)
+    failed |= not exact
+
+    masks = [np.asarray(d) for d in fast_dither]
+    # Odd crop exercises the zero-padded edge blocks.
+    stack = np.stack(masks).astype(np.float32)[:, : args.height - 3, : args.width - 5]
+    reference, loop_s = _timed(lambda: np.stack([_fft_filter_blocks_8x8_loop(p, 1.5, 2.6, 3.6) for p in stack]))
+    fast, fast_s = _timed(lambda: fft_filter_blocks_8x8_array(stack, 1.5, 2.6, 3.6), args.repeat)
+    exact = reference.tobytes() == fast.tobytes()
+    report("fft blocks (4 planes)", exact, loop_s, fast_s)
+    failed |= not exact
+
+    covs = [rng.random((args.height, args.width), dtype=np.float32) for _ in phases]
+    for stage, planes, rounding in (
+        ("composite binary", masks, "round"),
+        ("composite truncate", masks, "truncate"),
+        ("composite continuous", covs, "round"),
+    ):
+        reference, loop_s = _timed(lambda: _composite_ink_loop(planes, CMYK_INKS, rounding))
+        fast, fast_s = _timed(lambda: composite_ink(planes, CMYK_INKS, rounding=rounding), args.repeat)
+        exact = reference.tobytes() == fast.tobytes()
+        report(stage, exact, loop_s, fast_s)
+        failed |= not exact
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""FFT-organic style: GCR Morton dots shaped by a per-block 8x8 FFT band filter."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from .cache import PlaneCache
+from .diffusion import ErrorDiffuser
+from .engine import (
+    CYAN_T,
+    MAGENTA_T,
+    YELLOW_T,
+    composite_ink,
+    dither_array,
+    fft_filter_blocks_8x8_array,
+    screen_phases,
+)
+from .fused import render_fused
+from .profiling import stage
+from .tiled import DOWNSAMPLE_FACTOR, load_planes, render_tiled
+
+# Deeper K to avoid muddy midtone blacks in dense shadow regions.
+FFT_INKS = (CYAN_T, MAGENTA_T, YELLOW_T, (0.08, 0.08, 0.08))
+# Slight K gain after FFT shaping to preserve heavy shadow mass.
+FFT_GAINS = (1.0, 1.0, 1.0, 1.25)
+
+
+def fft_filter_blocks_8x8(
+    img_mask: Image.Image,
+    low_max: float,
+    high_min: float,
+    high_max: float,
+) -> np.ndarray:
+    """Return continuous coverage [0,1] after block FFT filtering.
+
+    Keeps low frequencies and a high band, while removing medium and very-high
+    frequencies per 8x8 block.
+    """
+    arr = (np.array(img_mask.convert("L"), dtype=np.float32) / 255.0)
+    return fft_filter_blocks_8x8_array(arr, low_max=low_max, high_min=high_min, high_max=high_max)
+
+
+def composite_ink_continuous(
+    c_cov: np.ndarray,
+    m_cov: np.ndarray,
+    y_cov: np.ndarray,
+    k_cov: np.ndarray,
+    precision: str = "float64",
+) -> Image.Image:
+    return composite_ink([c_cov, m_cov, y_cov, k_cov], inks=FFT_INKS, precision=precision)
+
+
+def dither_cmyk(planes: np.ndarray, y0: int = 0, screen: str = "morton", screen_size: int = 8) -> np.ndarray:
+    """Screen-dither GCR CMYK planes whose first row is image row y0.
+
+    Returns a (4, h, w) float32 CMYK stack of 0/1 dots.
+    """
+    return np.stack(
+        [
+            dither_array(plane, xp, yp, y_origin=y0, screen=screen, screen_size=screen_size)
+            for plane, (xp, yp) in zip(planes, screen_phases(screen_size))
+        ]
+    ).astype(np.float32)
+
+
+def prepare_dithered(
+    input_path: Path,
+    cache: PlaneCache | None = None,
+    screen: str = "morton",
+    screen_size: int = 8,
+    diffusion: str | None = None,
+    downsample: float = DOWNSAMPLE_FACTOR,
+) -> np.ndarray:
+    """Load, downsample, GCR-separate and dither one input.
+
+    This is the part of the pipeline that does not depend on the FFT band
+    options, so sweeps compute it once per input.
+    """
+    planes = load_planes(input_path, "gcr", cache, downsample)
+    if diffusion:
+        return (ErrorDiffuser(diffusion)(planes) != 0).astype(np.float32)
+    return dither_cmyk(planes, screen=screen, screen_size=screen_size)
+
+
+def render_fft_organic(
+    dithered: np.ndarray,
+    low_max: float,
+    high_min: float,
+    high_max: float,
+    precision: str = "float64",
+) -> Image.Image:
+    """Block-filter and composite a stack from ``prepare_dithered``."""
+    # All four channels go through one batched block FFT.
+    with stage("filter"):
+        c_cov, m_cov, y_cov, k_cov = fft_filter_blocks_8x8_array(
+            dithered, low_max=low_max, high_min=high_min, high_max=high_max
+        )
+        k_cov = np.clip(k_cov * FFT_GAINS[3], 0.0, 1.0)
+
+    with stage("composite"):
+        return composite_ink_continuous(c_cov, m_cov, y_cov, k_cov, precision)
+
+
+def render_band(
+    planes: np.ndarray,
+    y0: int,
+    size: tuple[int, int],
+    low_max: float,
+    high_min: float,
+    high_max: float,
+    fused: str | None = None,
+    precision: str = "float64",
+    screen: str = "morton",
+    screen_size: int = 8,
+    diffuser: ErrorDiffuser | None = None,
+) -> np.ndarray:
+    """Render rows [y0, y0 + rows) of the downsampled GCR planes.
+
+    Bands start on multiples of 8, so the FFT blocks line up with the
+    whole-image block grid.
+    """
+    if diffuser is not None:
+        with stage("dither"):
+            planes = diffuser(planes, y0)
+    if fused:
+        with stage("fused"):
+            return render_fused(
+                planes,
+                y0=y0,
+                band=(low_max, high_min, high_max),
+                gains=FFT_GAINS,
+                inks=FFT_INKS,
+                precision=precision,
+                engine=fused,
+                screen=screen,
+                screen_size=screen_size,
+            )
+
+    with stage("dither"):
+        dithered = dither_cmyk(planes, y0, screen, screen_size)
+    return np.asarray(
+        render_fft_organic(dithered, low_max=low_max, high_min=high_min, high_max=high_max, precision=precision)
+    )
+
+
+def process_image(
+    input_path: Path,
+    output_path: Path,
+    low_max: float,
+    high_min: float,
+    high_max: float,
+    band_rows: int = 0,
+    fused: str | None = None,
+    precision: str = "float64",
+    cache: PlaneCache | None = None,
+    screen: str = "morton",
+    screen_size: int = 8,
+    diffusion: str | None = None,
+    downsample: float = DOWNSAMPLE_FACTOR,
+) -> None:
+    render_tiled(
+        input_path,
+        output_path,
+        render_band,
+        band_rows,
+        separation="gcr",
+        cache=cache,
+        downsample=downsample,
+        fused=fused,
+        precision=precision,
+        low_max=low_max,
+        high_min=high_min,
+        high_max=high_max,
+        screen=screen,
+        screen_size=screen_size,
+        diffuser=ErrorDiffuser(diffusion) if diffusion else None,
+    )
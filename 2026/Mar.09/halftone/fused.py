@@ -0,0 +1,336 @@
+"""Single-pass dither -> block filter -> ink composite kernel.
+
+The staged renderers threshold whole channels into mode "1" images, convert
+them back to float planes for the block FFT and only then composite, so every
+stage leaves a full-size intermediate behind. ``render_fused`` instead walks
+the image in tiles aligned to the 16x8 Morton period and runs all three stages
+on one tile before moving on, writing straight into the RGB output.
+
+Two engines are available:
+- "numpy": per-tile NumPy calls into the shared ``halftone.engine`` stages,
+  bit-identical to the staged pipeline.
+- "numba": a JIT-compiled per-8x8-block loop, used when Numba is installed.
+  Numba has no FFT, so the band filter runs as the equivalent 64x64 real
+  operator; filtered renders may differ from the FFT by 1 in rare pixels.
+
+``main`` (run as ``python mar09_fused.py``) checks the engines against the
+staged pipeline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import time
+from collections.abc import Sequence
+from functools import lru_cache
+
+import numpy as np
+
+from .cli import ENGINES
+from .engine import (
+    CMYK_INKS,
+    MORTON_PHASES,
+    PAPER,
+    composite_ink_array,
+    dither_array,
+    fft_band_keep_8x8,
+    fft_filter_blocks_8x8_array,
+    screen_phases,
+    threshold_plane,
+)
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Tile edge in pixels; a multiple of 16 so every tile sees the same slice of
+# the 8x8 Morton threshold plane, and of 8 so filter blocks never straddle
+# tiles. Larger screens round it up to a multiple of their 2N-row period.
+TILE = 128
+
+
+def resolve_engine(engine: str, precision: str = "float64") -> str:
+    """Pick the engine; the Numba kernel only implements float64 compositing."""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown fused engine {engine!r}; expected one of {ENGINES}")
+    if engine == "auto":
+        return "numba" if numba is not None and precision == "float64" else "numpy"
+    if engine == "numba" and numba is None:
+        raise RuntimeError("The numba fused engine needs the numba package")
+    if engine == "numba" and precision != "float64":
+        raise ValueError(f"The numba fused engine has no {precision} compositor; use the numpy engine")
+    return engine
+
+
+@lru_cache(maxsize=32)
+def fft_band_operator_8x8(low_max: float, high_min: float, high_max: float) -> np.ndarray:
+    """The 8x8 FFT band filter as a (64, 64) real matrix on row-major blocks.
+
+    Column i is the filtered i-th basis block, so ``op @ block.ravel()`` equals
+    the FFT path before its clip, up to floating-point rounding.
+    """
+    basis = np.eye(64).reshape(64, 8, 8)
+    spec = np.fft.fft2(basis) * fft_band_keep_8x8(low_max, high_min, high_max)
+    op = np.real(np.fft.ifft2(spec)).reshape(64, 64).T.copy()
+    op.setflags(write=False)
+    return op
+
+
+def _render_numpy(
+    values: np.ndarray,
+    phases: Sequence[tuple[int, int]],
+    y0: int,
+    band: tuple[float, float, float] | None,
+    gains: Sequence[float],
+    inks: Sequence[tuple[float, float, float]],
+    paper: tuple[float, float, float],
+    rounding: str,
+    precision: str,
+    tile: int,
+    screen: str,
+    screen_size: int,
+) -> np.ndarray:
+    _, h, w = values.shape
+    out = np.empty((h, w, 3), dtype=np.uint8)
+    # Tile origins are multiples of the screen period, so one threshold tile
+    # per channel serves every tile of the band.
+    n = screen_size
+    thresholds = [threshold_plane(tile, tile, xp % n, (yp + y0) % (2 * n), screen, n) for xp, yp in phases]
+    for ty in range(0, h, tile):
+        for tx in range(0, w, tile):
+            block = values[:, ty : ty + tile, tx : tx + tile]
+            th, tw = block.shape[1:]
+            masks = [plane >= thr[:th, :tw] for plane, thr in zip(block, thresholds)]
+            if band is None:
+                coverage = masks
+            else:
+                coverage = fft_filter_blocks_8x8_array(np.stack(masks).astype(np.float32), *band)
+                coverage = [plane if g == 1.0 else np.clip(plane * g, 0.0, 1.0) for plane, g in zip(coverage, gains)]
+            out[ty : ty + th, tx : tx + tw] = composite_ink_array(coverage, inks, paper, rounding, precision)
+    return out
+
+
+def _fused_kernel(values, thresholds, op, filtered, gains, inks, paper, round_half_even, out):
+    """Per-8x8-block loop shared by the Numba engine and the self-check.
+
+    ``thresholds`` is a (4, 2N, N) stack of one screen period per channel,
+    already phased for the band's first row.
+    """
+    n, h, w = values.shape
+    period_y, period_x = thresholds.shape[1:]
+    cov = np.zeros((n, 64), dtype=np.float32)
+    acc = np.zeros(64, dtype=np.float64)
+    for by in range(0, h, 8):
+        for bx in range(0, w, 8):
+            for c in range(n):
+                for j in range(8):
+                    for i in range(8):
+                        y = by + j
+                        x = bx + i
+                        dot = y < h and x < w and values[c, y, x] >= thresholds[c, y % period_y, x % period_x]
+                        cov[c, j * 8 + i] = 1.0 if dot else 0.0
+                if filtered:
+                    for r in range(64):
+                        s = 0.0
+                        for k in range(64):
+                            s += op[r, k] * cov[c, k]
+                        acc[r] = s
+                    for r in range(64):
+                        v = np.float32(min(max(acc[r], 0.0), 1.0))
+                        if gains[c] != 1.0:
+                            v = np.float32(v * np.float32(gains[c]))
+                            v = np.float32(min(max(v, 0.0), 1.0))
+                        cov[c, r] = v
+
+            for j in range(8):
+                y = by + j
+                if y >= h:
+                    break
+                for i in range(8):
+                    x = bx + i
+                    if x >= w:
+                        break
+                    for b in range(3):
+                        value = paper[b]
+                        for c in range(n):
+                            if filtered:
+                                value *= 1.0 - np.float64(cov[c, j * 8 + i]) * (1.0 - inks[c, b])
+                            elif cov[c, j * 8 + i] != 0.0:
+                                value *= inks[c, b]
+                        value *= 255.0
+                        if round_half_even:
+                            value = np.rint(value)
+                        out[y, x, b] = np.uint8(min(max(value, 0.0), 255.0))
+
+
+_fused_kernel_jit = numba.njit(cache=True)(_fused_kernel) if numba is not None else None
+
+
+def _kernel_args(
+    values: np.ndarray,
+    phases: Sequence[tuple[int, int]],
+    y0: int,
+    band: tuple[float, float, float] | None,
+    gains: Sequence[float],
+    inks: Sequence[tuple[float, float, float]],
+    paper: tuple[float, float, float],
+    rounding: str,
+    screen: str = "morton",
+    screen_size: int = 8,
+) -> tuple:
+    n = screen_size
+    thresholds = np.stack(
+        [threshold_plane(n, 2 * n, xp % n, (yp + y0) % (2 * n), screen, n) for xp, yp in phases]
+    )
+    op = fft_band_operator_8x8(*band) if band is not None else np.zeros((64, 64))
+    _, h, w = values.shape
+    out = np.empty((h, w, 3), dtype=np.uint8)
+    return (
+        np.ascontiguousarray(values),
+        thresholds,
+        op,
+        band is not None,
+        np.asarray(gains, dtype=np.float64),
+        np.asarray(inks, dtype=np.float64),
+        np.asarray(paper, dtype=np.float64),
+        rounding == "round",
+        out,
+    )
+
+
+def render_fused(
+    values: np.ndarray,
+    phases: Sequence[tuple[int, int]] | None = None,
+    y0: int = 0,
+    band: tuple[float, float, float] | None = None,
+    gains: Sequence[float] | None = None,
+    inks: Sequence[tuple[float, float, float]] = CMYK_INKS,
+    paper: tuple[float, float, float] = PAPER,
+    rounding: str = "round",
+    precision: str = "float64",
+    engine: str = "auto",
+    tile: int = TILE,
+    screen: str = "morton",
+    screen_size: int = 8,
+) -> np.ndarray:
+    """Dither, optionally block-filter and composite a (4, h, w) channel stack.
+
+    ``values`` are channel values on the 0..255 scale (uint8 or float) whose
+    first row is image row ``y0``. Without ``band`` the dots composite as
+    binary masks; with ``band=(low_max, high_min, high_max)`` each channel's
+    dots go through the 8x8 FFT band filter, are scaled by ``gains`` and
+    clipped, and composite as continuous coverage. ``precision`` selects the
+    compositor arithmetic as in ``composite_ink_array``. ``screen`` and
+    ``screen_size`` pick the threshold matrix; ``phases`` default to its
+    staggered C, M, Y, K phases. Returns (h, w, 3) uint8.
+    """
+    if rounding not in ("round", "truncate"):
+        raise ValueError(f"Unknown rounding mode: {rounding!r}")
+    if tile % 16:
+        raise ValueError(f"Tile size must be a multiple of 16, got {tile}")
+    phases = phases if phases is not None else screen_phases(screen_size)
+    gains = tuple(gains) if gains is not None else (1.0,) * len(phases)
+    tile = math.lcm(tile, 2 * screen_size)
+
+    if resolve_engine(engine, precision) == "numpy":
+        return _render_numpy(
+            np.asarray(values), phases, y0, band, gains, inks, paper, rounding, precision, tile, screen, screen_size
+        )
+
+    args = _kernel_args(values, phases, y0, band, gains, inks, paper, rounding, screen, screen_size)
+    _fused_kernel_jit(*args)
+    return args[-1]
+
+
+def _render_staged(
+    values: np.ndarray,
+    band: tuple[float, float, float] | None,
+    gains: Sequence[float],
+    rounding: str,
+    screen: str = "morton",
+    screen_size: int = 8,
+) -> np.ndarray:
+    masks = [
+        dither_array(plane, xp, yp, screen=screen, screen_size=screen_size)
+        for plane, (xp, yp) in zip(values, screen_phases(screen_size))
+    ]
+    if band is None:
+        return composite_ink_array(masks, rounding=rounding)
+    coverage = fft_filter_blocks_8x8_array(np.stack(masks).astype(np.float32), *band)
+    coverage = [np.clip(plane * g, 0.0, 1.0) if g != 1.0 else plane for plane, g in zip(coverage, gains)]
+    return composite_ink_array(coverage)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Check the fused Mar.09 kernel against the staged pipeline"
+    )
+    parser.add_argument("--width", type=int, default=960)
+    parser.add_argument("--height", type=int, default=640)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 256, (4, args.height, args.width), dtype=np.uint8)
+    gains = (1.0, 1.0, 1.0, 1.25)
+    failed = False
+    print(f"Size: {args.width}x{args.height}, numba {'available' if numba is not None else 'not installed'}")
+
+    for stage, band, rounding in (
+        ("binary round", None, "round"),
+        ("binary truncate", None, "truncate"),
+        ("fft band", (1.5, 2.6, 3.6), "round"),
+    ):
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            reference = _render_staged(values, band, gains, rounding)
+        staged_s = (time.perf_counter() - t0) / args.repeat
+
+        engines = ["numpy"] + (["numba"] if numba is not None else [])
+        for engine in engines:
+            render_fused(values, band=band, gains=gains, rounding=rounding, engine=engine)  # warm up / compile
+            t0 = time.perf_counter()
+            for _ in range(args.repeat):
+                fused = render_fused(values, band=band, gains=gains, rounding=rounding, engine=engine)
+            fused_s = (time.perf_counter() - t0) / args.repeat
+            diff = np.abs(fused.astype(np.int16) - reference).max()
+            ok = diff == 0 or (engine == "numba" and band is not None and diff <= 1)
+            failed |= not ok
+            print(
+                f"{stage:16s} {engine:6s} max diff={diff} "
+                f"staged={staged_s * 1000.0:8.1f} ms  fused={fused_s * 1000.0:8.1f} ms  "
+                f"({staged_s / fused_s:.2f}x)"
+            )
+
+    # The plain-Python kernel is what Numba compiles; check it on a small crop
+    # so its logic is covered even without Numba installed.
+    crop = values[:, :37, :45]
+    for band in (None, (1.5, 2.6, 3.6)):
+        kernel_args = _kernel_args(crop, MORTON_PHASES, 0, band, gains, CMYK_INKS, PAPER, "round")
+        _fused_kernel(*kernel_args)
+        diff = np.abs(kernel_args[-1].astype(np.int16) - _render_staged(crop, band, gains, "round")).max()
+        ok = diff == 0 or (band is not None and diff <= 1)
+        failed |= not ok
+        print(f"python kernel    {'fft band' if band else 'binary':8s} max diff={diff}")
+
+    # Other screens change the threshold period the tiles and kernel index by.
+    for screen, size in (("bayer", 4), ("blue", 16)):
+        reference = _render_staged(values, None, gains, "round", screen, size)
+        fused = render_fused(values, engine="numpy", screen=screen, screen_size=size)
+        kernel_args = _kernel_args(crop, screen_phases(size), 0, None, gains, CMYK_INKS, PAPER, "round", screen, size)
+        _fused_kernel(*kernel_args)
+        diff = max(
+            np.abs(fused.astype(np.int16) - reference).max(),
+            np.abs(kernel_args[-1].astype(np.int16) - reference[:37, :45]).max(),
+        )
+        failed |= diff != 0
+        print(f"screen {screen:6s} {size:3d}x{size:<3d} max diff={diff}")
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Gabor style: each CMYK channel modulated by an oriented Gabor field before its screen dither."""
+
+from __future__ import annotations
+
+import math
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from .cache import PlaneCache
+from .diffusion import ErrorDiffuser
+from .engine import dither_array, gabor_field_rows, ink_palette, pack_ink_bits, screen_phases
+from .fused import render_fused
+from .profiling import stage
+from .tiled import DOWNSAMPLE_FACTOR, PalettedBand, render_tiled
+
+# Gabor orientation (degrees) and phase (radians) per C, M, Y, K channel.
+GABOR_ANGLES = (
+    (22.5, 0.0),
+    (67.5, math.pi / 2.0),
+    (112.5, math.pi),
+    (157.5, 3.0 * math.pi / 2.0),
+)
+
+# Solid process inks on white: for 0/255 dots this is exactly PIL's
+# CMYK -> RGB conversion of the merged masks.
+WHITE = (1.0, 1.0, 1.0)
+PROCESS_INKS = ((0.0, 1.0, 1.0), (1.0, 0.0, 1.0), (1.0, 1.0, 0.0), (0.0, 0.0, 0.0))
+
+
+def gabor_modulate(
+    values: np.ndarray,
+    gabor_theta_deg: float,
+    gabor_phase_rad: float,
+    gabor_strength: float,
+    gabor_freq: float,
+    gabor_sigma_scale: float,
+    size: tuple[int, int] | None = None,
+    y0: int = 0,
+) -> np.ndarray:
+    """Add the channel's Gabor field to (rows, w) channel values, clipped to 0..255."""
+    src = np.asarray(values, dtype=np.float64)
+    w, h = size or (src.shape[1], src.shape[0])
+
+    sigma = max(1.0, min(w, h) * gabor_sigma_scale)
+    theta_rad = math.radians(gabor_theta_deg)
+
+    g = gabor_field_rows(w, h, gabor_freq, sigma, theta_rad, gabor_phase_rad, y0, y0 + src.shape[0])
+
+    return np.clip(src + (gabor_strength * 255.0) * g.astype(np.float64), 0.0, 255.0)
+
+
+def dither_channel_gabor(
+    channel: Image.Image,
+    x_phase: int,
+    y_phase: int,
+    gabor_theta_deg: float,
+    gabor_phase_rad: float,
+    gabor_strength: float,
+    gabor_freq: float,
+    gabor_sigma_scale: float,
+    size: tuple[int, int] | None = None,
+    y0: int = 0,
+    screen: str = "morton",
+    screen_size: int = 8,
+) -> Image.Image:
+    """Dither ``channel``, which holds rows [y0, y0 + height) of an image of ``size``."""
+    modulated = gabor_modulate(
+        np.asarray(channel),
+        gabor_theta_deg,
+        gabor_phase_rad,
+        gabor_strength,
+        gabor_freq,
+        gabor_sigma_scale,
+        size,
+        y0,
+    )
+    bits = dither_array(modulated, x_phase, y_phase, y_origin=y0, screen=screen, screen_size=screen_size)
+    return Image.fromarray(np.where(bits, 255, 0).astype(np.uint8))
+
+
+def render_band(
+    planes: np.ndarray,
+    y0: int,
+    size: tuple[int, int],
+    gabor_strength: float,
+    gabor_freq: float,
+    gabor_sigma_scale: float,
+    fused: str | None = None,
+    paletted: bool = False,
+    screen: str = "morton",
+    screen_size: int = 8,
+    diffuser: ErrorDiffuser | None = None,
+) -> np.ndarray | PalettedBand:
+    """Render rows [y0, y0 + rows) of the downsampled CMYK planes."""
+    phases = screen_phases(screen_size)
+    if fused or paletted or diffuser is not None:
+        with stage("modulate"):
+            modulated = np.stack(
+                [
+                    gabor_modulate(plane, theta, phase, gabor_strength, gabor_freq, gabor_sigma_scale, size, y0)
+                    for plane, (theta, phase) in zip(planes, GABOR_ANGLES)
+                ]
+            )
+        if diffuser is not None:
+            with stage("dither"):
+                modulated = diffuser(modulated, y0)
+            if not (fused or paletted):
+                with stage("composite"):
+                    composite = Image.merge("CMYK", [Image.fromarray(dots) for dots in modulated]).convert("RGB")
+                    return np.asarray(composite)
+        if paletted:
+            with stage("dither"):
+                masks = [
+                    dither_array(values, xp, yp, y_origin=y0, screen=screen, screen_size=screen_size)
+                    for values, (xp, yp) in zip(modulated, phases)
+                ]
+            with stage("composite"):
+                return PalettedBand(pack_ink_bits(masks), ink_palette(PROCESS_INKS, WHITE))
+        with stage("fused"):
+            return render_fused(
+                modulated,
+                y0=y0,
+                inks=PROCESS_INKS,
+                paper=WHITE,
+                engine=fused,
+                screen=screen,
+                screen_size=screen_size,
+            )
+
+    # The staged path modulates inside each channel's dither.
+    with stage("dither"):
+        dots = [
+            dither_channel_gabor(
+                Image.fromarray(plane),
+                x_phase=xp,
+                y_phase=yp,
+                gabor_theta_deg=theta,
+                gabor_phase_rad=phase,
+                gabor_strength=gabor_strength,
+                gabor_freq=gabor_freq,
+                gabor_sigma_scale=gabor_sigma_scale,
+                size=size,
+                y0=y0,
+                screen=screen,
+                screen_size=screen_size,
+            )
+            for plane, (xp, yp), (theta, phase) in zip(planes, phases, GABOR_ANGLES)
+        ]
+
+    with stage("composite"):
+        composite = Image.merge("CMYK", dots).convert("RGB")
+        return np.asarray(composite)
+
+
+def process_image(
+    input_path: Path,
+    output_path: Path,
+    gabor_strength: float,
+    gabor_freq: float,
+    gabor_sigma_scale: float,
+    band_rows: int = 0,
+    fused: str | None = None,
+    paletted: bool = False,
+    cache: PlaneCache | None = None,
+    screen: str = "morton",
+    screen_size: int = 8,
+    diffusion: str | None = None,
+    downsample: float = DOWNSAMPLE_FACTOR,
+) -> None:
+    render_tiled(
+        input_path,
+        output_path,
+        render_band,
+        band_rows,
+        separation="pil",
+        cache=cache,
+        downsample=downsample,
+        fused=fused,
+        paletted=paletted,
+        gabor_strength=gabor_strength,
+        gabor_freq=gabor_freq,
+        gabor_sigma_scale=gabor_sigma_scale,
+        screen=screen,
+        screen_size=screen_size,
+        diffuser=ErrorDiffuser(diffusion) if diffusion else None,
+    )
@@ -0,0 +1,103 @@
+"""Offset style: staggered Morton CMYK dots composited as ink on paper."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from .cache import PlaneCache
+from .diffusion import ErrorDiffuser
+from .engine import (
+    composite_ink,
+    dither_array,
+    dither_channel,
+    ink_palette,
+    pack_ink_bits,
+    screen_phases,
+)
+from .fused import render_fused
+from .profiling import stage
+from .tiled import DOWNSAMPLE_FACTOR, PalettedBand, render_tiled
+
+
+def composite_ink_on_paper(
+    c: Image.Image,
+    m: Image.Image,
+    y: Image.Image,
+    k: Image.Image,
+    precision: str = "float64",
+) -> Image.Image:
+    """Composite binary CMYK masks into RGB with a simple transmittance model."""
+    return composite_ink([np.asarray(c), np.asarray(m), np.asarray(y), np.asarray(k)], precision=precision)
+
+
+def render_band(
+    planes: np.ndarray,
+    y0: int,
+    size: tuple[int, int],
+    fused: str | None = None,
+    precision: str = "float64",
+    paletted: bool = False,
+    screen: str = "morton",
+    screen_size: int = 8,
+    diffuser: ErrorDiffuser | None = None,
+) -> np.ndarray | PalettedBand:
+    """Render rows [y0, y0 + rows) of the downsampled CMYK planes."""
+    if diffuser is not None:
+        with stage("dither"):
+            planes = diffuser(planes, y0)
+    phases = screen_phases(screen_size)
+    if paletted:
+        with stage("dither"):
+            masks = [
+                dither_array(p, xp, yp, y_origin=y0, screen=screen, screen_size=screen_size)
+                for p, (xp, yp) in zip(planes, phases)
+            ]
+        with stage("composite"):
+            return PalettedBand(pack_ink_bits(masks), ink_palette())
+    if fused:
+        with stage("fused"):
+            return render_fused(
+                planes, y0=y0, precision=precision, engine=fused, screen=screen, screen_size=screen_size
+            )
+
+    with stage("dither"):
+        c_d, m_d, y_d, k_d = (
+            dither_channel(Image.fromarray(plane), xp, yp, y0, screen, screen_size)
+            for plane, (xp, yp) in zip(planes, phases)
+        )
+
+    with stage("composite"):
+        return np.asarray(composite_ink_on_paper(c_d, m_d, y_d, k_d, precision))
+
+
+def process_image(
+    input_path: Path,
+    output_path: Path,
+    band_rows: int = 0,
+    fused: str | None = None,
+    precision: str = "float64",
+    paletted: bool = False,
+    cache: PlaneCache | None = None,
+    screen: str = "morton",
+    screen_size: int = 8,
+    diffusion: str | None = None,
+    downsample: float = DOWNSAMPLE_FACTOR,
+) -> None:
+    render_tiled(
+        input_path,
+        output_path,
+        render_band,
+        band_rows,
+        separation="pil",
+        cache=cache,
+        downsample=downsample,
+        fused=fused,
+        precision=precision,
+        paletted=paletted,
+        screen=screen,
+        screen_size=screen_size,
+        diffuser=ErrorDiffuser(diffusion) if diffusion else None,
+    )
@@ -0,0 +1,138 @@
+"""Per-stage timers and optional cProfile dumps for the Mar.09 render scripts.
+
+The pipeline marks its steps with ``with stage("dither"):`` blocks. They cost
+one global lookup unless ``run_batch`` has switched recording on for the
+image being rendered, in which case each stage accumulates wall time, call
+count (one per band) and the peak traced memory while it ran. ``--timings``
+prints the breakdown after each ``Saved:`` line (``--timings json`` prints it
+as one JSON object per image); ``--profile`` also dumps a cProfile ``.prof``
+file next to each output.
+
+Stages do not nest: tracemalloc's peak is reset when a stage starts, so the
+recorder keeps the overall peak of the render itself.
+"""
+
+from __future__ import annotations
+
+import argparse
+import cProfile
+import json
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import NamedTuple
+
+# Recorder of the image currently rendering in this process, if any.
+_active: StageRecord | None = None
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--timings",
+        nargs="?",
+        const="text",
+        default=None,
+        choices=("text", "json"),
+        help="Print a per-stage time and peak memory breakdown for each image",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Dump a cProfile <output>.prof file next to each output",
+    )
+
+
+class ProfileOptions(NamedTuple):
+    timings: str | None = None
+    cprofile: bool = False
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> ProfileOptions | None:
+        if args.timings is None and not args.profile:
+            return None
+        return cls(args.timings, args.profile)
+
+
+class StageRecord:
+    """Per-stage ``[seconds, calls, peak_bytes]`` of one render."""
+
+    def __init__(self) -> None:
+        self.stages: dict[str, list] = {}
+        self.peak = 0
+
+    def _traced_peak(self) -> int:
+        peak = tracemalloc.get_traced_memory()[1]
+        self.peak = max(self.peak, peak)
+        return peak
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Attribute the enclosed block to stage ``name`` when recording."""
+    record = _active
+    if record is None:
+        yield
+        return
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        record._traced_peak()
+        tracemalloc.reset_peak()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        entry = record.stages.setdefault(name, [0.0, 0, 0])
+        entry[0] += time.perf_counter() - t0
+        entry[1] += 1
+        if tracing:
+            entry[2] = max(entry[2], record._traced_peak())
+
+
+@contextmanager
+def record_stages(output_path: Path, options: ProfileOptions | None) -> Iterator[StageRecord]:
+    """Record the stages of one render; the yielded record fills in as it runs.
+
+    With ``options.cprofile`` the render is also profiled into ``output_path``
+    with a ``.prof`` suffix. Without options nothing is recorded.
+    """
+    global _active
+    record = StageRecord()
+    if options is None:
+        yield record
+        return
+    profiler = cProfile.Profile() if options.cprofile else None
+    _active = record
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield record
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(output_path.with_suffix(".prof"))
+        _active = None
+
+
+def format_stages(output_path: Path, stages: dict[str, list], elapsed: float, fmt: str) -> str:
+    if fmt == "json":
+        return json.dumps(
+            {
+                "output": str(output_path),
+                "elapsed_s": round(elapsed, 6),
+                "stages": {
+                    name: {"seconds": round(s, 6), "calls": calls, "peak_bytes": peak}
+                    for name, (s, calls, peak) in stages.items()
+                },
+            }
+        )
+    lines = []
+    for name, (seconds, calls, peak) in stages.items():
+        share = seconds / elapsed if elapsed > 0 else 0.0
+        lines.append(
+            f"  {name:12s} {seconds * 1000.0:9.1f} ms {share:6.1%}  x{calls:<4d} peak {peak / (1 << 20):7.1f} MiB"
+        )
+    other = elapsed - sum(seconds for seconds, _, _ in stages.values())
+    lines.append(f"  {'(other)':12s} {other * 1000.0:9.1f} ms")
+    return "\n".join(lines)
@@ -0,0 +1,209 @@
+"""N x N ordered-dither threshold matrices for any power-of-two N.
+
+Four screens are available:
+- "morton": Z-order rank, the bit interleave of x and y (the original 8x8)
+- "bayer": the recursive Bayer index matrix
+- "hilbert": position along the Hilbert curve
+- "blue": Ulichney's void-and-cluster blue noise (Gaussian sigma 1.5, seeded)
+
+Ranks 0..N*N-1 map onto the 0..255 value scale as ``(rank + 0.5) * 256 / N^2``
+(at least 1, so zero coverage never prints), which for the 8x8 Morton matrix
+is the ``(rank + 0.5) * 4`` it always used. Rank matrices are written to
+``.npy`` files in the threshold cache directory after the first build, so
+the blue-noise ones (seconds at 128x128, minutes at 256x256) are built once.
+
+``main`` (run as ``python mar09_thresholds.py``) builds (or loads) each screen
+and prints its timing.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from .cli import SCREENS
+
+# Bump when a generator's output changes for the same kind and size.
+THRESHOLDS_VERSION = 1
+
+# Void-and-cluster filter width and the seed of its initial pattern.
+BLUE_SIGMA = 1.5
+BLUE_SEED = 0
+
+
+def default_cache_dir() -> Path:
+    """``$MAR09_THRESHOLD_DIR``, else ``mar09/thresholds`` under the user cache."""
+    override = os.environ.get("MAR09_THRESHOLD_DIR")
+    if override:
+        return Path(override)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "mar09" / "thresholds"
+
+
+def _check_size(n: int) -> int:
+    if n < 2 or n & (n - 1):
+        raise ValueError(f"Threshold matrix size must be a power of two >= 2, got {n}")
+    return n.bit_length() - 1
+
+
+def morton_ranks(n: int) -> np.ndarray:
+    """Z-order index of every cell: x bits on even, y bits on odd positions."""
+    bits = _check_size(n)
+    axis = np.arange(n)
+    ranks = np.zeros((n, n), dtype=np.int64)
+    for bit in range(bits):
+        ranks |= ((axis[np.newaxis, :] >> bit) & 1) << (2 * bit)
+        ranks |= ((axis[:, np.newaxis] >> bit) & 1) << (2 * bit + 1)
+    return ranks
+
+
+def bayer_ranks(n: int) -> np.ndarray:
+    """Recursive Bayer matrix: M(2n) = [[4M, 4M + 2], [4M + 3, 4M + 1]]."""
+    _check_size(n)
+    ranks = np.zeros((1, 1), dtype=np.int64)
+    while ranks.shape[0] < n:
+        ranks = np.block([[4 * ranks, 4 * ranks + 2], [4 * ranks + 3, 4 * ranks + 1]])
+    return ranks
+
+
+def hilbert_ranks(n: int) -> np.ndarray:
+    """Distance of every cell along the n x n Hilbert curve."""
+    _check_size(n)
+    y, x = np.indices((n, n), dtype=np.int64)
+    ranks = np.zeros((n, n), dtype=np.int64)
+    s = n // 2
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        ranks += s * s * ((3 * rx) ^ ry)
+        # Rotate the quadrant so the sub-curve starts where the parent expects.
+        flip = ~ry & rx
+        x = np.where(flip, n - 1 - x, x)
+        y = np.where(flip, n - 1 - y, y)
+        x, y = np.where(~ry, y, x), np.where(~ry, x, y)
+        s //= 2
+    return ranks
+
+
+def void_and_cluster_ranks(n: int, sigma: float = BLUE_SIGMA, seed: int = BLUE_SEED) -> np.ndarray:
+    """Blue-noise ranks by Ulichney's void-and-cluster method on a torus.
+
+    A seeded sparse pattern is relaxed until its tightest cluster is also its
+    largest void. Its dots are then ranked by removing tightest clusters, and
+    the remaining cells by filling largest voids; with a Gaussian filter the
+    largest void among zeros is also the tightest cluster of the inverted
+    pattern, so one fill loop covers both of Ulichney's later phases.
+    """
+    _check_size(n)
+    d = np.minimum(np.arange(n), n - np.arange(n)).astype(np.float64)
+    kernel = np.exp(-(d[:, np.newaxis] ** 2 + d[np.newaxis, :] ** 2) / (2.0 * sigma * sigma))
+    rows = np.arange(n)
+
+    def splat(energy: np.ndarray, index: int, sign: float) -> None:
+        y, x = divmod(index, n)
+        energy += sign * kernel[(rows - y) % n][:, (rows - x) % n]
+
+    rng = np.random.default_rng(seed)
+    pattern = rng.random((n, n)) < 0.1
+    pattern.flat[0] = True
+    energy = np.real(np.fft.ifft2(np.fft.fft2(pattern) * np.fft.fft2(kernel)))
+
+    while True:
+        cluster = int(np.argmax(np.where(pattern, energy, -np.inf)))
+        pattern.flat[cluster] = False
+        splat(energy, cluster, -1.0)
+        void = int(np.argmin(np.where(pattern, np.inf, energy)))
+        pattern.flat[void] = True
+        splat(energy, void, 1.0)
+        if void == cluster:
+            break
+
+    ranks = np.zeros((n, n), dtype=np.int64)
+    ones = int(pattern.sum())
+
+    remaining, remaining_energy = pattern.copy(), energy.copy()
+    for rank in range(ones - 1, -1, -1):
+        cluster = int(np.argmax(np.where(remaining, remaining_energy, -np.inf)))
+        remaining.flat[cluster] = False
+        splat(remaining_energy, cluster, -1.0)
+        ranks.flat[cluster] = rank
+
+    for rank in range(ones, n * n):
+        void = int(np.argmin(np.where(pattern, np.inf, energy)))
+        pattern.flat[void] = True
+        splat(energy, void, 1.0)
+        ranks.flat[void] = rank
+
+    return ranks
+
+
+_GENERATORS = {
+    "morton": morton_ranks,
+    "bayer": bayer_ranks,
+    "hilbert": hilbert_ranks,
+    "blue": void_and_cluster_ranks,
+}
+
+
+@lru_cache(maxsize=32)
+def rank_matrix(kind: str, n: int) -> np.ndarray:
+    """Read-only (n, n) ranks 0..n*n-1 of screen ``kind``, from disk when cached."""
+    if kind not in _GENERATORS:
+        raise ValueError(f"Unknown threshold matrix {kind!r}; expected one of {SCREENS}")
+    _check_size(n)
+    path = default_cache_dir() / f"{kind}-{n}-v{THRESHOLDS_VERSION}.npy"
+
+    ranks = None
+    try:
+        ranks = np.load(path)
+    except (OSError, ValueError):
+        pass
+    if ranks is None or ranks.shape != (n, n):
+        ranks = _GENERATORS[kind](n).astype(np.min_scalar_type(n * n - 1))
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npy")
+            np.save(tmp, ranks)
+            os.replace(tmp, path)
+        except OSError:
+            # A read-only cache only costs a rebuild next time.
+            pass
+
+    ranks.setflags(write=False)
+    return ranks
+
+
+@lru_cache(maxsize=32)
+def threshold_matrix(kind: str, n: int) -> np.ndarray:
+    """Read-only (n, n) uint8 thresholds of screen ``kind`` on the 0..255 scale."""
+    ranks = rank_matrix(kind, n).astype(np.int64)
+    thresholds = np.maximum((2 * ranks + 1) * 128 // (n * n), 1).astype(np.uint8)
+    thresholds.setflags(write=False)
+    return thresholds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build and cache the Mar.09 threshold matrices")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[8, 16, 32, 64])
+    parser.add_argument("--kinds", nargs="+", choices=SCREENS, default=list(SCREENS))
+    args = parser.parse_args()
+
+    print(f"Cache: {default_cache_dir()}")
+    for kind in args.kinds:
+        for n in args.sizes:
+            t0 = time.perf_counter()
+            ranks = rank_matrix(kind, n)
+            elapsed = time.perf_counter() - t0
+            complete = np.array_equal(np.sort(ranks, axis=None), np.arange(n * n))
+            print(f"{kind:8s} {n:4d}x{n:<4d} {elapsed * 1000.0:9.1f} ms  ranks {'ok' if complete else 'BROKEN'}")
+            if not complete:
+                raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+"""Banded (out-of-core) execution for the Mar.09 render scripts.
+
+A style provides ``render_band(planes, y0, size, **params)``: it receives rows
+[y0, y0 + rows) of the downsampled (2x by default), CMYK-separated image as a
+(4, rows, w) uint8 stack plus the full downsampled ``size``, and returns those rows of
+the final render as an (rows, w, 3) uint8 array, or as a ``PalettedBand`` to
+write a paletted PNG. ``render_tiled`` either calls
+it once for the whole image (``band_rows=0``) or walks horizontal bands aligned
+to the 8-pixel Morton period and streams each band straight into the PNG
+encoder.
+
+In banded mode the decoded source is the only full-resolution buffer; the
+downsampled image, CMYK planes, dither masks and coverage arrays only ever exist
+for one band. With a ``PlaneCache`` the separated planes are read from (or
+written to) a memory-mapped ``.npy`` and the source is not decoded at all on a
+hit.
+"""
+
+from __future__ import annotations
+
+import itertools
+import math
+import struct
+import zlib
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+from PIL import Image
+
+from .cache import PlaneCache
+from .engine import separate_cmyk
+from .profiling import stage
+
+BAND_ALIGN = 8
+DOWNSAMPLE_FACTOR = 2
+
+
+def scaled_size(size: tuple[int, int], factor: float = DOWNSAMPLE_FACTOR) -> tuple[int, int]:
+    """Output size of a ``factor``x downsample, whole pixels only."""
+    if factor <= 0:
+        raise ValueError(f"Downsample factor must be positive, got {factor}")
+    w, h = size
+    return max(1, int(w / factor)), max(1, int(h / factor))
+
+
+def _box_factor(size: tuple[int, int], factor: float) -> int | None:
+    """``factor`` as an int when the box path applies, else None."""
+    f = int(factor)
+    w, h = size
+    return f if f == factor and w >= f and h >= f else None
+
+
+def downsample(img: Image.Image, factor: float = DOWNSAMPLE_FACTOR) -> Image.Image:
+    """The RGB image reduced ``factor`` times.
+
+    Integer factors area-average with ``Image.reduce`` over the whole blocks
+    (a partial block at the right or bottom edge is dropped); any other factor
+    falls back to Pillow's bilinear resize.
+    """
+    box = _box_factor(img.size, factor)
+    rgb = img.convert("RGB")
+    if box == 1:
+        return rgb
+    if box is not None:
+        out_w, out_h = scaled_size(img.size, box)
+        return rgb.reduce(box, box=(0, 0, out_w * box, out_h * box))
+    return rgb.resize(scaled_size(img.size, factor), resample=Image.Resampling.BILINEAR)
+
+
+# Fixed-point precision of Pillow's 8-bit resampler (Resample.c).
+_PIL_PRECISION_BITS = 32 - 8 - 2
+
+
+def _bilinear_row_taps(in_size: int, out_size: int, y0: int, y1: int) -> tuple[np.ndarray, np.ndarray]:
+    """Source row bounds and fixed-point weights of Pillow's bilinear resize.
+
+    Mirrors ``precompute_coeffs`` and ``normalize_coeffs_8bpc`` for output rows
+    [y0, y1) of a full-height resize, in the same double-precision order, so
+    the taps are bit-identical to those Pillow uses for the whole image.
+    Returns (ymin[rows], weights[rows, ksize]).
+    """
+    scale = in_size / out_size
+    filterscale = max(scale, 1.0)
+    support = 1.0 * filterscale
+    inv_filterscale = 1.0 / filterscale
+    ksize = int(math.ceil(support)) * 2 + 1
+
+    ymins = np.zeros(y1 - y0, dtype=np.int64)
+    weights = np.zeros((y1 - y0, ksize), dtype=np.int64)
+    for row, yy in enumerate(range(y0, y1)):
+        center = 0.0 + (yy + 0.5) * scale
+        ymin = max(int(center - support + 0.5), 0)
+        ymax = min(int(center + support + 0.5), in_size) - ymin
+        taps = []
+        for y in range(ymax):
+            x = abs((y + ymin - center + 0.5) * inv_filterscale)
+            taps.append(1.0 - x if x < 1.0 else 0.0)
+        ww = 0.0
+        for w in taps:
+            ww += w
+        if ww != 0.0:
+            taps = [w / ww for w in taps]
+        ymins[row] = ymin
+        weights[row, :ymax] = [int(0.5 + w * (1 << _PIL_PRECISION_BITS)) for w in taps]
+    return ymins, weights
+
+
+def downsample_rows(img: Image.Image, factor: float, y0: int, y1: int) -> Image.Image:
+    """Rows [y0, y1) of ``downsample(img, factor)``, bit-exact.
+
+    Integer factors only crop and convert the source rows of those blocks.
+    """
+    box = _box_factor(img.size, factor)
+    if box is None:
+        return _resize_linear_rows(img, scaled_size(img.size, factor), y0, y1)
+    w = img.size[0]
+    slab = img.crop((0, y0 * box, w, y1 * box)).convert("RGB")
+    if box == 1:
+        return slab
+    return slab.reduce(box, box=(0, 0, w // box * box, slab.height))
+
+
+def _resize_linear_rows(img: Image.Image, size: tuple[int, int], y0: int, y1: int) -> Image.Image:
+    """Rows [y0, y1) of ``img.convert("RGB").resize(size, BILINEAR)``, bit-exact.
+
+    Only the source rows under the filter taps of those output rows are
+    cropped and converted. The horizontal pass is Pillow's own (rows are
+    independent there); the vertical pass reproduces Pillow's fixed-point
+    arithmetic with the taps of the full-height resize, so banded output
+    matches the whole-image resize for any reduction factor.
+    """
+    w, h = img.size
+    out_w, out_h = size
+    ymins, weights = _bilinear_row_taps(h, out_h, y0, y1)
+    ksize = weights.shape[1]
+
+    s0 = int(ymins.min())
+    s1 = min(h, int(ymins.max()) + ksize)
+    slab = img.crop((0, s0, w, s1)).convert("RGB")
+    slab = slab.resize((out_w, s1 - s0), resample=Image.Resampling.BILINEAR, box=(0, 0, w, s1 - s0))
+    rows = np.asarray(slab, dtype=np.int64)
+
+    acc = np.full((y1 - y0, out_w, 3), 1 << (_PIL_PRECISION_BITS - 1), dtype=np.int64)
+    for j in range(ksize):
+        idx = np.minimum(ymins - s0 + j, rows.shape[0] - 1)
+        acc += rows[idx] * weights[:, j, np.newaxis, np.newaxis]
+    out = np.clip(acc >> _PIL_PRECISION_BITS, 0, 255).astype(np.uint8)
+    return Image.fromarray(out)
+
+
+class PalettedBand(NamedTuple):
+    """Rows of palette indices plus the (n, 3) uint8 RGB palette they index."""
+
+    indices: np.ndarray
+    palette: np.ndarray
+
+
+def save_paletted(band: PalettedBand, output_path: Path) -> None:
+    img = Image.fromarray(np.ascontiguousarray(band.indices, dtype=np.uint8))
+    img.putpalette(np.ascontiguousarray(band.palette, dtype=np.uint8).tobytes())
+    img.save(output_path)
+
+
+class PngStreamWriter:
+    """Write an 8-bit RGB or paletted PNG one band of rows at a time.
+
+    Each row gets the None, Sub or Up filter, whichever has the smallest sum of
+    absolute residuals, and the compressed stream is flushed as IDAT chunks as
+    bands arrive, so only one band is ever held in memory. With a ``palette``
+    rows are palette indices, packed 4 bits per pixel for up to 16 colours as
+    PIL does.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        width: int,
+        height: int,
+        level: int = 6,
+        palette: np.ndarray | None = None,
+    ) -> None:
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self._z = zlib.compressobj(level)
+        self._f = open(path, "wb")
+        self._f.write(b"\x89PNG\r\n\x1a\n")
+        if palette is None:
+            self._bits, self._bpp, row_bytes = 8, 3, width * 3
+            self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        else:
+            palette = np.ascontiguousarray(palette, dtype=np.uint8)
+            self._bits = 4 if len(palette) <= 16 else 8
+            self._bpp = 1
+            row_bytes = -(-width * self._bits // 8)
+            self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, self._bits, 3, 0, 0, 0))
+            self._chunk(b"PLTE", palette.tobytes())
+        self._paletted = palette is not None
+        self._prev = np.zeros(row_bytes, dtype=np.uint8)
+
+    def __enter__(self) -> PngStreamWriter:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._f.close()
+
+    def _chunk(self, kind: bytes, data: bytes) -> None:
+        self._f.write(struct.pack(">I", len(data)))
+        self._f.write(kind)
+        self._f.write(data)
+        self._f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind)) & 0xFFFFFFFF))
+
+    def _pack(self, rows: np.ndarray) -> np.ndarray:
+        n = rows.shape[0]
+        if not self._paletted:
+            return rows.reshape(n, self.width * 3)
+        if self._bits == 8:
+            return rows
+        if self.width % 2:
+            rows = np.concatenate([rows, np.zeros((n, 1), dtype=np.uint8)], axis=1)
+        return (rows[:, 0::2] << 4) | rows[:, 1::2]
+
+    def write_rows(self, rows: np.ndarray) -> None:
+        rows = np.ascontiguousarray(rows, dtype=np.uint8)
+        n = rows.shape[0]
+        expected = (self.width,) if self._paletted else (self.width, 3)
+        if rows.shape[1:] != expected:
+            raise ValueError(f"Expected rows of shape (n, {', '.join(map(str, expected))}), got {rows.shape}")
+        if self.rows_written + n > self.height:
+            raise ValueError("More rows written than the PNG height")
+
+        raw = self._pack(rows)
+        bpp = self._bpp
+        up = np.vstack([self._prev[np.newaxis], raw[:-1]])
+        left = np.zeros_like(raw)
+        left[:, bpp:] = raw[:, :-bpp]
+        candidates = np.stack([raw, raw - left, raw - up])
+        cost = np.abs(candidates.view(np.int8).astype(np.int32)).sum(axis=2)
+        choice = cost.argmin(axis=0)
+
+        out = np.empty((n, 1 + raw.shape[1]), dtype=np.uint8)
+        out[:, 0] = choice
+        out[:, 1:] = candidates[choice, np.arange(n)]
+
+        data = self._z.compress(out.tobytes())
+        if data:
+            self._chunk(b"IDAT", data)
+        self._prev = raw[-1].copy()
+        self.rows_written += n
+
+    def close(self) -> None:
+        if self.rows_written != self.height:
+            self._f.close()
+            raise ValueError(f"PNG closed after {self.rows_written} of {self.height} rows")
+        self._chunk(b"IDAT", self._z.flush())
+        self._chunk(b"IEND", b"")
+        self._f.close()
+
+
+def plane_bands(
+    input_path: Path,
+    separation: str,
+    band_rows: int = 0,
+    cache: PlaneCache | None = None,
+    factor: float = DOWNSAMPLE_FACTOR,
+) -> Iterator[tuple[int, np.ndarray]]:
+    """Yield (y0, planes) bands of the ``factor``x downsampled, separated input.
+
+    ``band_rows <= 0`` yields the whole image as one band. A cache miss fills
+    the cache entry band by band; it is published once every band has been
+    yielded.
+    """
+    with stage("load"):
+        src = Image.open(input_path)
+    out_w, out_h = scaled_size(src.size, factor)
+    shape = (4, out_h, out_w)
+    step = out_h if band_rows <= 0 else band_rows
+
+    if cache is not None:
+        path = cache.path_for(input_path, separation, factor)
+        with stage("cache"):
+            planes = cache.load(path, shape)
+        if planes is not None:
+            for y0 in range(0, out_h, step):
+                yield y0, planes[:, y0 : y0 + step]
+            return
+        store, tmp = cache.create(path, shape)
+
+    try:
+        with stage("load"):
+            src.load()
+        for y0 in range(0, out_h, step):
+            y1 = min(y0 + step, out_h)
+            with stage("downsample"):
+                if band_rows <= 0:
+                    small = downsample(src, factor)
+                else:
+                    small = downsample_rows(src, factor, y0, y1)
+            with stage("separation"):
+                planes = separate_cmyk(small, separation)
+            if cache is not None:
+                store[:, y0:y1] = planes
+            yield y0, planes
+    except BaseException:
+        if cache is not None:
+            del store
+            cache.discard(tmp)
+        raise
+
+    if cache is not None:
+        store.flush()
+        del store
+        cache.commit(tmp, path)
+
+
+def load_planes(
+    input_path: Path,
+    separation: str,
+    cache: PlaneCache | None = None,
+    factor: float = DOWNSAMPLE_FACTOR,
+) -> np.ndarray:
+    """The whole (4, h, w) downsampled, separated input."""
+    bands = list(plane_bands(input_path, separation, 0, cache, factor))
+    return bands[0][1]
+
+
+def render_tiled(
+    input_path: Path,
+    output_path: Path,
+    render_band: Callable[..., np.ndarray | PalettedBand],
+    band_rows: int = 0,
+    separation: str = "pil",
+    cache: PlaneCache | None = None,
+    downsample: float = DOWNSAMPLE_FACTOR,
+    **params: object,
+) -> None:
+    """Render ``input_path`` to ``output_path`` with ``render_band``.
+
+    ``band_rows <= 0`` renders the whole image in one band and saves it with
+    PIL. Otherwise bands of ``band_rows`` downsampled rows (rounded up to a
+    multiple of 8) are rendered and streamed into a ``PngStreamWriter``.
+    ``downsample`` is the reduction factor applied before separation.
+    """
+    with stage("load"):
+        size = scaled_size(Image.open(input_path).size, downsample)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if band_rows <= 0:
+        for y0, planes in plane_bands(input_path, separation, 0, cache, downsample):
+            band = render_band(planes, y0, size, **params)
+            with stage("save"):
+                if isinstance(band, PalettedBand):
+                    save_paletted(band, output_path)
+                else:
+                    Image.fromarray(band).save(output_path)
+        return
+
+    band_rows = -(-band_rows // BAND_ALIGN) * BAND_ALIGN
+    out_w, out_h = size
+    bands = (
+        render_band(planes, y0, size, **params)
+        for y0, planes in plane_bands(input_path, separation, band_rows, cache, downsample)
+    )
+    # The first band decides between an RGB and a paletted PNG.
+    first = next(bands)
+    palette = first.palette if isinstance(first, PalettedBand) else None
+    with PngStreamWriter(output_path, out_w, out_h, palette=palette) as writer:
+        for band in itertools.chain([first], bands):
+            with stage("save"):
+                writer.write_rows(band.indices if palette is not None else band)
@@ -0,0 +1,159 @@
+"""Uncertainty style: offset Morton base blended with a Gabor-perturbed continuous composite."""
+
+from __future__ import annotations
+
+import math
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from .cache import PlaneCache
+from .diffusion import ErrorDiffuser
+from .engine import composite_ink, dither_channel, gabor_field_rows, screen_phases
+from .fused import render_fused
+from .profiling import stage
+from .tiled import DOWNSAMPLE_FACTOR, render_tiled
+
+# Gabor orientation (degrees) and phase (radians) per C, M, Y, K channel.
+UNCERTAINTY_GABOR = (
+    (22.5, 0.0),
+    (67.5, math.pi / 2.0),
+    (112.5, math.pi),
+    (157.5, 3.0 * math.pi / 2.0),
+)
+
+
+def channel_uncertainty_coverage(
+    planes: np.ndarray,
+    strength: float,
+    freq: float,
+    sigma_scale: float,
+    size: tuple[int, int] | None = None,
+    y0: int = 0,
+) -> np.ndarray:
+    """Gabor-perturbed coverage for a (4, h, w) uint8 CMYK stack.
+
+    Returns a (4, h, w) float32 stack in [0, 1]. For a band, ``size`` is the
+    full image size and ``y0`` the image row of the band's first row.
+    """
+    _, h, w = planes.shape
+    full_w, full_h = size or (w, h)
+    sigma = max(1.0, min(full_w, full_h) * sigma_scale)
+
+    field = np.stack(
+        [
+            gabor_field_rows(full_w, full_h, freq, sigma, math.radians(theta_deg), phase_rad, y0, y0 + h)
+            for theta_deg, phase_rad in UNCERTAINTY_GABOR
+        ]
+    )
+
+    base = planes / 255.0
+    # Larger uncertainty in mid-tones; low in extremes.
+    tone_weight = 0.2 + 3.2 * (base * (1.0 - base))
+    cov = base + strength * field.astype(np.float64) * tone_weight
+    return np.clip(cov, 0.0, 1.0).astype(np.float32)
+
+
+def composite_ink_binary(
+    c: Image.Image,
+    m: Image.Image,
+    y: Image.Image,
+    k: Image.Image,
+    precision: str = "float64",
+) -> Image.Image:
+    return composite_ink(
+        [np.asarray(c), np.asarray(m), np.asarray(y), np.asarray(k)],
+        rounding="truncate",
+        precision=precision,
+    )
+
+
+def composite_ink_continuous(coverage: np.ndarray, precision: str = "float64") -> Image.Image:
+    return composite_ink(coverage, precision=precision)
+
+
+def render_band(
+    planes: np.ndarray,
+    y0: int,
+    size: tuple[int, int],
+    blend: float,
+    uncertainty_strength: float,
+    gabor_freq: float,
+    gabor_sigma_scale: float,
+    fused: str | None = None,
+    precision: str = "float64",
+    screen: str = "morton",
+    screen_size: int = 8,
+    diffuser: ErrorDiffuser | None = None,
+) -> np.ndarray:
+    """Render rows [y0, y0 + rows) of the downsampled CMYK planes."""
+    # Base: offset Morton (no gabor).
+    dots = planes
+    if diffuser is not None:
+        with stage("dither"):
+            dots = diffuser(planes, y0)
+    if fused:
+        with stage("fused"):
+            base = Image.fromarray(
+                render_fused(
+                    dots,
+                    y0=y0,
+                    rounding="truncate",
+                    precision=precision,
+                    engine=fused,
+                    screen=screen,
+                    screen_size=screen_size,
+                )
+            )
+    else:
+        with stage("dither"):
+            c_d, m_d, y_d, k_d = (
+                dither_channel(Image.fromarray(plane), xp, yp, y0, screen, screen_size)
+                for plane, (xp, yp) in zip(dots, screen_phases(screen_size))
+            )
+        with stage("composite"):
+            base = composite_ink_binary(c_d, m_d, y_d, k_d, precision)
+
+    # Continuous gabor uncertainty composite.
+    with stage("filter"):
+        coverage = channel_uncertainty_coverage(planes, uncertainty_strength, gabor_freq, gabor_sigma_scale, size, y0)
+    with stage("composite"):
+        uncertain = composite_ink_continuous(coverage, precision)
+        return np.asarray(Image.blend(base, uncertain, blend))
+
+
+def process_image(
+    input_path: Path,
+    output_path: Path,
+    blend: float,
+    uncertainty_strength: float,
+    gabor_freq: float,
+    gabor_sigma_scale: float,
+    band_rows: int = 0,
+    fused: str | None = None,
+    precision: str = "float64",
+    cache: PlaneCache | None = None,
+    screen: str = "morton",
+    screen_size: int = 8,
+    diffusion: str | None = None,
+    downsample: float = DOWNSAMPLE_FACTOR,
+) -> None:
+    render_tiled(
+        input_path,
+        output_path,
+        render_band,
+        band_rows,
+        separation="pil",
+        cache=cache,
+        downsample=downsample,
+        fused=fused,
+        precision=precision,
+        blend=blend,
+        uncertainty_strength=uncertainty_strength,
+        gabor_freq=gabor_freq,
+        gabor_sigma_scale=gabor_sigma_scale,
+        screen=screen,
+        screen_size=screen_size,
+        diffuser=ErrorDiffuser(diffusion) if diffusion else None,
+    )
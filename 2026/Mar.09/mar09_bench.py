@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""Benchmark the Mar.09 pipeline stages and end-to-end style renders.
+
+Each size renders a synthetic square RGB image (smooth gradients plus noise,
+seeded, so every run sees the same pixels) and times the shared stages on it:
+downsample, the two CMYK separations, Morton dithering, the 8x8 FFT block
+filter, the uncertainty coverage field and the binary and continuous ink
+compositors. ``process_image`` of each of the four styles is then timed on
+the same image written to a temporary PNG.
+
+Every timing records the first (cold) call and the best and median of all
+calls. Results go to JSON with the library versions and machine they came
+from; ``--compare OLD [NEW]`` lines up two such files (or OLD and a fresh
+run) and flags entries whose best time grew by more than ``--threshold``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+import PIL
+from PIL import Image
+
+BENCH_VERSION = 1
+SIZES = (512, 1024, 2048, 4096, 8192)
+DEFAULT_SIZES = (512, 1024, 2048)
+FFT_BAND = (1.5, 2.6, 3.6)
+STAGES = (
+    "downsample",
+    "separate_pil",
+    "separate_gcr",
+    "dither",
+    "fft_filter",
+    "uncertainty_coverage",
+    "composite_binary",
+    "composite_continuous",
+)
+
+# Module and script defaults of each style's process_image.
+STYLES: dict[str, tuple[str, dict]] = {
+    "offset": ("halftone.offset", {}),
+    "uncertainty": (
+        "halftone.uncertainty",
+        {"blend": 1.0, "uncertainty_strength": 0.22, "gabor_freq": 0.018, "gabor_sigma_scale": 0.03125},
+    ),
+    "fftorganic": ("halftone.fftorganic", {"low_max": 1.5, "high_min": 2.6, "high_max": 3.6}),
+    "gabor": ("halftone.gabor", {"gabor_strength": 0.18, "gabor_freq": 0.018, "gabor_sigma_scale": 0.03125}),
+}
+
+
+def synthetic_image(size: int, seed: int = 0) -> Image.Image:
+    """Deterministic size x size RGB test image with gradients, rings and noise."""
+    rng = np.random.default_rng(seed)
+    axis = np.linspace(0.0, 1.0, size, dtype=np.float32)
+    x, y = axis[None, :], axis[:, None]
+    r = np.hypot(x - 0.5, y - 0.5)
+    rgb = np.empty((size, size, 3), dtype=np.uint8)
+    # One channel at a time keeps the float32 temporaries at one plane each.
+    for c, field in enumerate(
+        (
+            lambda: 0.5 + 0.5 * np.sin(2.0 * math.pi * (3.0 * x + y)),
+            lambda: y * 0.8 + 0.1 * np.cos(40.0 * r),
+            lambda: 1.0 - 0.9 * x * y,
+        )
+    ):
+        plane = rng.standard_normal((size, size), dtype=np.float32)
+        plane *= 12.0
+        plane += field() * 230.0
+        rgb[..., c] = np.clip(plane, 0.0, 255.0)
+    return Image.fromarray(rgb)
+
+
+def time_call(fn: Callable[[], object], repeat: int) -> dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return {"cold_s": times[0], "best_s": min(times), "median_s": statistics.median(times)}
+
+
+def stage_benchmarks(img: Image.Image) -> dict[str, Callable[[], object]]:
+    """Zero-argument callables for each shared stage, with their inputs prepared."""
+    from halftone.engine import (
+        MORTON_PHASES,
+        composite_ink_array,
+        dither_array,
+        fft_filter_blocks_8x8_array,
+        separate_cmyk,
+    )
+    from halftone.tiled import downsample
+    from halftone.uncertainty import channel_uncertainty_coverage
+
+    half = downsample(img)
+    planes = separate_cmyk(half, "pil")
+    masks = [dither_array(p, xp, yp) for p, (xp, yp) in zip(planes, MORTON_PHASES)]
+    stack = np.stack(masks).astype(np.float32)
+    coverage = fft_filter_blocks_8x8_array(stack, *FFT_BAND)
+
+    return {
+        "downsample": lambda: downsample(img),
+        "separate_pil": lambda: separate_cmyk(half, "pil"),
+        "separate_gcr": lambda: separate_cmyk(half, "gcr"),
+        "dither": lambda: [dither_array(p, xp, yp) for p, (xp, yp) in zip(planes, MORTON_PHASES)],
+        "fft_filter": lambda: fft_filter_blocks_8x8_array(stack, *FFT_BAND),
+        "uncertainty_coverage": lambda: channel_uncertainty_coverage(planes, 0.22, 0.018, 0.03125),
+        "composite_binary": lambda: composite_ink_array(masks),
+        "composite_continuous": lambda: composite_ink_array(coverage),
+    }
+
+
+def run_benchmarks(
+    sizes: list[int],
+    stages: list[str] | None,
+    styles: list[str],
+    repeat: int,
+    log: Callable[[str], None] = print,
+) -> dict:
+    results = []
+    with tempfile.TemporaryDirectory(prefix="mar09-bench-") as tmp:
+        for size in sizes:
+            img = synthetic_image(size)
+            pixels = size * size
+            for name, fn in stage_benchmarks(img).items():
+                if stages is not None and name not in stages:
+                    continue
+                entry = {"size": size, "name": f"stage:{name}", **time_call(fn, repeat)}
+                entry["mpix_s"] = pixels / entry["best_s"] / 1e6
+                results.append(entry)
+                log(format_entry(entry))
+
+            input_path = Path(tmp) / f"synthetic-{size}.png"
+            img.save(input_path, compress_level=1)
+            del img
+            for style in styles:
+                module_name, params = STYLES[style]
+                process_image = importlib.import_module(module_name).process_image
+                output_path = Path(tmp) / f"{style}-{size}.png"
+                entry = {
+                    "size": size,
+                    "name": f"style:{style}",
+                    **time_call(lambda: process_image(input_path, output_path, **params), repeat),
+                }
+                entry["mpix_s"] = pixels / entry["best_s"] / 1e6
+                results.append(entry)
+                log(format_entry(entry))
+            input_path.unlink()
+
+    return {
+        "version": BENCH_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "machine": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pillow": PIL.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def format_entry(entry: dict) -> str:
+    return (
+        f"{entry['size']:5d}  {entry['name']:28s} best={entry['best_s'] * 1000.0:10.1f} ms  "
+        f"median={entry['median_s'] * 1000.0:10.1f} ms  cold={entry['cold_s'] * 1000.0:10.1f} ms  "
+        f"{entry['mpix_s']:8.2f} Mpix/s"
+    )
+
+
+def compare_runs(
+    old: dict,
+    new: dict,
+    threshold: float,
+    min_delta_s: float = 0.001,
+    log: Callable[[str], None] = print,
+) -> list[str]:
+    """Print best-time ratios for entries in both runs; return the regressed keys.
+
+    An entry regresses when its best time grew by more than ``threshold`` and
+    by more than ``min_delta_s``, so timer noise on tiny stages is ignored.
+    """
+    before = {(e["size"], e["name"]): e for e in old["results"]}
+    regressions = []
+    for entry in new["results"]:
+        key = (entry["size"], entry["name"])
+        if key not in before:
+            continue
+        ratio = entry["best_s"] / before[key]["best_s"]
+        flag = ""
+        if ratio > 1.0 + threshold and entry["best_s"] - before[key]["best_s"] > min_delta_s:
+            flag = "  REGRESSION"
+            regressions.append(f"{key[0]} {key[1]}")
+        elif ratio < 1.0 / (1.0 + threshold):
+            flag = "  faster"
+        log(
+            f"{key[0]:5d}  {key[1]:28s} {before[key]['best_s'] * 1000.0:10.1f} -> "
+            f"{entry['best_s'] * 1000.0:10.1f} ms  ({1.0 / ratio:5.2f}x){flag}"
+        )
+    if old.get("machine") != new.get("machine"):
+        log("note: the runs come from different machines or library versions")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Time the Mar.09 halftone stages and style renders on synthetic images"
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=int,
+        default=list(DEFAULT_SIZES),
+        help=f"Square image edges to render (e.g. {' '.join(map(str, SIZES))})",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timed calls per entry")
+    parser.add_argument(
+        "--stages",
+        nargs="*",
+        choices=STAGES,
+        default=None,
+        help="Only these stages (default: all; pass none to skip stages)",
+    )
+    parser.add_argument(
+        "--styles",
+        nargs="*",
+        choices=sorted(STYLES),
+        default=sorted(STYLES),
+        help="Styles to time end to end (pass none to skip)",
+    )
+    parser.add_argument("--output", type=Path, default=None, help="Write results as JSON")
+    parser.add_argument(
+        "--compare",
+        nargs="+",
+        type=Path,
+        metavar="JSON",
+        help="Compare OLD against NEW, or against a fresh run when only OLD is given",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Flag entries whose best time grew by more than this fraction",
+    )
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=1.0,
+        help="Ignore slowdowns smaller than this many milliseconds",
+    )
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) > 2:
+        parser.error("--compare takes OLD and optionally NEW")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    if args.compare and len(args.compare) == 2:
+        run = json.loads(args.compare[1].read_text())
+    else:
+        run = run_benchmarks(args.sizes, args.stages, args.styles, args.repeat)
+        if args.output is not None:
+            args.output.parent.mkdir(parents=True, exist_ok=True)
+            args.output.write_text(json.dumps(run, indent=2) + "\n")
+            print(f"Wrote {args.output}")
+
+    if args.compare:
+        print()
+        regressions = compare_runs(
+            json.loads(args.compare[0].read_text()), run, args.threshold, args.min_delta_ms / 1000.0
+        )
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}", file=sys.stderr)
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""Check and time the error-diffusion engines.
+
+The code lives in ``halftone.diffusion``; this is its command-line entry point.
+"""
+
+from halftone.diffusion import main
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,147 @@
 #!/usr/bin/env python3
-"""Animate linear FFT-option progression and encode WebM."""
+"""Animate linear FFT-option progression and encode WebM.
+
+Downsample, CMYK separation and dithering do not depend on the swept FFT
+options, so they run once per input; each frame only redoes the block filter
+and the ink composite. Frames are streamed as raw RGB to a single ffmpeg
+process instead of round-tripping through PNG files.
+
+With --workers N the frames are rendered by a process pool. The dithered stack
+is placed in shared memory once and every worker maps it read-only; tasks only
+carry the three FFT options, and frames are handed to the encoder in order.
+"""
 
 from __future__ import annotations
 
 import argparse
-import shutil
 import subprocess
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 from pathlib import Path
 
-from mar09_morton_fftorganic import infer_short_name, process_image
+import numpy as np
+from PIL import Image
+
+from halftone.cache import PlaneCache
+from halftone.cli import (
+    add_cache_arguments,
+    add_diffusion_arguments,
+    add_downsample_arguments,
+    add_precision_arguments,
+    add_screen_arguments,
+    infer_short_name,
+)
+from halftone.fftorganic import prepare_dithered, render_fft_organic
 
 
 def lerp(a: float, b: float, t: float) -> float:
     return a + (b - a) * t
 
 
+def frame_options(args: argparse.Namespace, index: int, frame_count: int) -> tuple[float, float, float]:
+    t = index / float(frame_count - 1)
+    low = lerp(args.low_start, args.low_end, t)
+    high_min = lerp(args.high_min_start, args.high_min_end, t)
+    high_max = lerp(args.high_max_start, args.high_max_end, t)
+    return low, high_min, high_max
+
+
+# Per-worker view of the shared dithered stack, set up by _init_worker.
+_worker_state: dict[str, object] = {}
+
+
+def _init_worker(shm_name: str, shape: tuple[int, ...], dtype: str, precision: str) -> None:
+    shm = shared_memory.SharedMemory(name=shm_name)
+    dithered = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    dithered.setflags(write=False)
+    _worker_state["shm"] = shm
+    _worker_state["dithered"] = dithered
+    _worker_state["precision"] = precision
+
+
+def _render_frame_shared(options: tuple[float, float, float]) -> bytes:
+    low, high_min, high_max = options
+    frame = render_fft_organic(
+        _worker_state["dithered"],
+        low_max=low,
+        high_min=high_min,
+        high_max=high_max,
+        precision=_worker_state["precision"],
+    )
+    return frame.tobytes()
+
+
+def render_frames(
+    dithered: np.ndarray,
+    options: list[tuple[float, float, float]],
+    workers: int,
+    precision: str = "float64",
+) -> Iterator[bytes]:
+    """Yield raw RGB24 frames for each (low, high_min, high_max), in order.
+
+    Each frame is a pure function of its options, so the output is identical
+    for any worker count. At most 2 * workers frames are in flight.
+    """
+    if workers <= 1:
+        for low, high_min, high_max in options:
+            frame = render_fft_organic(
+                dithered, low_max=low, high_min=high_min, high_max=high_max, precision=precision
+            )
+            yield frame.tobytes()
+        return
+
+    shm = shared_memory.SharedMemory(create=True, size=dithered.nbytes)
+    try:
+        shared = np.ndarray(dithered.shape, dtype=dithered.dtype, buffer=shm.buf)
+        shared[...] = dithered
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(shm.name, dithered.shape, dithered.dtype.str, precision),
+        ) as pool:
+            pending = deque()
+            for opts in options:
+                pending.append(pool.submit(_render_frame_shared, opts))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        del shared
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def open_encoder(ffmpeg: str, size: tuple[int, int], fps: int, webm_path: Path) -> subprocess.Popen:
+    """Start one ffmpeg process that reads raw RGB24 frames from stdin."""
+    ffmpeg_cmd = [
+        ffmpeg,
+        "-y",
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "rgb24",
+        "-s",
+        f"{size[0]}x{size[1]}",
+        "-framerate",
+        str(fps),
+        "-i",
+        "-",
+        "-c:v",
+        "libvpx-vp9",
+        "-pix_fmt",
+        "yuv420p",
+        "-b:v",
+        "0",
+        "-crf",
+        "32",
+        str(webm_path),
+    ]
+    return subprocess.Popen(ffmpeg_cmd, stdin=subprocess.PIPE)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Render WebM animations with linear progression of FFT options"
@@ -29,55 +156,56 @@ def main() -> None:
     parser.add_argument("--high-min-end", type=float, default=2.0)
     parser.add_argument("--high-max-start", type=float, default=4.6)
     parser.add_argument("--high-max-end", type=float, default=3.1)
-    parser.add_argument("--keep-frames", action="store_true")
+    parser.add_argument(
+        "--keep-frames",
+        action="store_true",
+        help="Also write each frame as PNG to _frames_<name>",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Render frames in N processes (output is identical for any N)",
+    )
+    parser.add_argument(
+        "--ffmpeg",
+        default="ffmpeg",
+        help="Encoder executable; frames are streamed to its stdin as rawvideo",
+    )
+    add_downsample_arguments(parser)
+    add_cache_arguments(parser)
+    add_precision_arguments(parser)
+    add_screen_arguments(parser)
+    add_diffusion_arguments(parser)
     args = parser.parse_args()
+    cache = PlaneCache.from_args(args)
 
     args.output_dir.mkdir(parents=True, exist_ok=True)
 
     for input_path in args.inputs:
         short = infer_short_name(input_path)
         frame_dir = args.output_dir / f"_frames_{short}"
-        frame_dir.mkdir(parents=True, exist_ok=True)
+        if args.keep_frames:
+            frame_dir.mkdir(parents=True, exist_ok=True)
 
-        frame_count = max(2, args.frames)
-        for i in range(frame_count):
-            t = i / float(frame_count - 1)
-            low = lerp(args.low_start, args.low_end, t)
-            high_min = lerp(args.high_min_start, args.high_min_end, t)
-            high_max = lerp(args.high_max_start, args.high_max_end, t)
-
-            frame_path = frame_dir / f"frame_{i:04d}.png"
-            process_image(
-                input_path=input_path,
-                output_path=frame_path,
-                low_max=low,
-                high_min=high_min,
-                high_max=high_max,
-            )
+        dithered = prepare_dithered(input_path, cache, args.screen, args.screen_size, args.diffusion, args.downsample)
+        size = (dithered.shape[2], dithered.shape[1])
 
         webm_path = args.output_dir / f"{short}-morton-fftorganic-sweep.webm"
-        ffmpeg_cmd = [
-            "ffmpeg",
-            "-y",
-            "-framerate",
-            str(args.fps),
-            "-i",
-            str(frame_dir / "frame_%04d.png"),
-            "-c:v",
-            "libvpx-vp9",
-            "-pix_fmt",
-            "yuv420p",
-            "-b:v",
-            "0",
-            "-crf",
-            "32",
-            str(webm_path),
-        ]
-        subprocess.run(ffmpeg_cmd, check=True)
-        print(f"Saved: {webm_path}")
+        frame_count = max(2, args.frames)
+        options = [frame_options(args, i, frame_count) for i in range(frame_count)]
+        with open_encoder(args.ffmpeg, size, args.fps, webm_path) as encoder:
+            for i, frame in enumerate(render_frames(dithered, options, args.workers, args.precision)):
+                encoder.stdin.write(frame)
+
+                if args.keep_frames:
+                    frame_path = frame_dir / f"frame_{i:04d}.png"
+                    Image.frombytes("RGB", size, frame).save(frame_path)
+                    print(f"Saved: {frame_path}")
 
-        if not args.keep_frames:
-            shutil.rmtree(frame_dir)
+        if encoder.returncode != 0:
+            raise subprocess.CalledProcessError(encoder.returncode, encoder.args)
+        print(f"Saved: {webm_path}")
 
 
 if __name__ == "__main__":
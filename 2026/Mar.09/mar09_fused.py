@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""Check the fused dither/filter/composite engines against the staged pipeline.
+
+The code lives in ``halftone.fused``; this is its command-line entry point.
+"""
+
+from halftone.fused import main
+
+if __name__ == "__main__":
+    main()
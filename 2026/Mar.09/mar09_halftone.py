@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""Check the vectorized Mar.09 stages against the original per-pixel loops.
+
+The code lives in ``halftone.engine``; this is its command-line entry point.
+"""
+
+from halftone.engine import main
+
+if __name__ == "__main__":
+    main()
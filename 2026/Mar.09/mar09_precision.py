@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Report the error and speed of the compositor precision modes.
+
+Every mode in ``PRECISIONS`` is compared against the float64 reference: first
+the compositor alone on random binary masks and continuous coverage, then each
+style's full render of the given inputs (or of random CMYK planes when no
+input is given). Errors are absolute 8-bit channel differences.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+
+from halftone.cli import PRECISIONS
+from halftone.engine import composite_ink_array
+
+# Script defaults of the styles whose output goes through the ink compositor.
+STYLES: dict[str, tuple[str, str, dict]] = {
+    "offset": ("halftone.offset", "pil", {}),
+    "uncertainty": (
+        "halftone.uncertainty",
+        "pil",
+        {"blend": 1.0, "uncertainty_strength": 0.22, "gabor_freq": 0.018, "gabor_sigma_scale": 0.03125},
+    ),
+    "fftorganic": ("halftone.fftorganic", "gcr", {"low_max": 1.5, "high_min": 2.6, "high_max": 3.6}),
+}
+
+
+def _timed(fn: Callable[[], np.ndarray], repeat: int) -> tuple[np.ndarray, float]:
+    result = fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - t0) / repeat
+
+
+def _report(label: str, render: Callable[[str], np.ndarray], repeat: int) -> None:
+    reference, ref_s = _timed(lambda: render("float64"), repeat)
+    for precision in PRECISIONS:
+        out, out_s = _timed(lambda: render(precision), repeat)
+        diff = np.abs(out.astype(np.int16) - reference)
+        print(
+            f"{label:28s} {precision:8s} max={int(diff.max()):2d} mean={diff.mean():.4f} "
+            f"differ={np.count_nonzero(diff.any(axis=-1)) / diff[..., 0].size:7.3%}  "
+            f"{out_s * 1000.0:8.1f} ms ({ref_s / out_s:.2f}x)"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Max/mean error and speed of the float32 compositor against float64"
+    )
+    parser.add_argument("inputs", nargs="*", type=Path, help="Images to render (default: random planes)")
+    parser.add_argument("--styles", nargs="+", choices=sorted(STYLES), default=sorted(STYLES))
+    parser.add_argument("--width", type=int, default=960, help="Size of the random test planes")
+    parser.add_argument("--height", type=int, default=640)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    shape = (args.height, args.width)
+    masks = [rng.random(shape) < 0.4 for _ in range(4)]
+    coverage = [rng.random(shape, dtype=np.float32) for _ in range(4)]
+    _report("compositor binary", lambda p: composite_ink_array(masks, precision=p), args.repeat)
+    _report("compositor continuous", lambda p: composite_ink_array(coverage, precision=p), args.repeat)
+
+    if args.inputs:
+        from halftone.tiled import load_planes
+
+        sources = [(path.name, lambda sep, path=path: load_planes(path, sep)) for path in args.inputs]
+    else:
+        random_planes = rng.integers(0, 256, (4, *shape), dtype=np.uint8)
+        sources = [("random", lambda sep: random_planes)]
+
+    for style in args.styles:
+        module_name, separation, params = STYLES[style]
+        render_band = importlib.import_module(module_name).render_band
+        for name, planes_for in sources:
+            planes = np.asarray(planes_for(separation))
+            size = (planes.shape[2], planes.shape[1])
+            _report(
+                f"{style} {name}"[:28],
+                lambda p: render_band(planes, 0, size, precision=p, **params),
+                args.repeat,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""Build and cache the Mar.09 threshold matrices.
+
+The code lives in ``halftone.thresholds``; this is its command-line entry point.
+"""
+
+from halftone.thresholds import main
+
+if __name__ == "__main__":
+    main()